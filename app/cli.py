@@ -1,14 +1,23 @@
 import click
+import json
+import multiprocessing
+import numpy as np
+from sqlalchemy import text, update
 from sqlalchemy.orm import Session
-from app.database import SessionLocal, engine, Base
-from app.models import Problem, User, UserProfile, PersonalizedDifficultyPrediction
+from app.database import SessionLocal, create_schema, engine
+from app.models import Problem, Submission, User, UserProfile, PersonalizedDifficultyPrediction
 from app.services.embedding_service import EmbeddingService
+from app.services.embedding_codec import EmbeddingCodec
+from app.services.vector_index import ProblemVectorIndex
 from app.services.data_generator import SyntheticDataGenerator
 from app.services.personalized_difficulty_model import PersonalizedDifficultyModel
 from app.services.hint_timing_model import HintTimingModel
-from app.config import DIFFICULTY_MODEL_PATH, HINT_TIMING_MODEL_PATH, SYNTHETIC_DATA_PATH
+from app.config import DIFFICULTY_MODEL_PATH, HINT_TIMING_MODEL_PATH, SYNTHETIC_DATA_PATH, PROBLEM_INDEX_PATH, EMBEDDING_DTYPE, \
+    RECOMPUTE_CHECKPOINT_PATH, LLM_MAX_CONCURRENCY
 from datetime import datetime
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 
 @click.group()
@@ -20,33 +29,124 @@ def cli():
 @cli.command()
 def init_db():
     """Initialize database"""
-    Base.metadata.create_all(bind=engine)
+    applied = create_schema()
+    if applied:
+        click.echo(f"  Applied migrations: {', '.join(map(str, applied))}")
     click.echo("✓ Database initialized")
 
 
 @cli.command()
-def embed_problems():
-    """Compute embeddings for all problems"""
+@click.option('--batch-size', default=64, help='Texts per encode call')
+@click.option('--page-size', default=1000, help='Problems read (and committed) per page')
+@click.option('--force', is_flag=True, help='Re-embed problems whose text has not changed')
+def embed_problems(batch_size, page_size, force):
+    """Compute embeddings for all problems (incremental and resumable)"""
     db = SessionLocal()
 
     click.echo("Loading embedding model...")
     emb_service = EmbeddingService()
+    index = ProblemVectorIndex.load(PROBLEM_INDEX_PATH) or ProblemVectorIndex()
+
+    total = db.query(Problem).count()
+    seen, embedded, last_id = 0, 0, 0
+    start = time.perf_counter()
+
+    # Keyset pagination; every page is committed, so an interrupted run resumes where it stopped
+    while True:
+        rows = (
+            db.query(Problem.id, Problem.title, Problem.tags, Problem.description, Problem.embedding_text_hash)
+            .filter(Problem.id > last_id)
+            .order_by(Problem.id)
+            .limit(page_size)
+            .all()
+        )
+        if not rows:
+            break
+        last_id = rows[-1].id
+        seen += len(rows)
+
+        changed, unindexed = [], []
+        for row in rows:
+            text = emb_service.problem_text(row.title, row.tags, row.description)
+            text_hash = emb_service.text_hash(text)
+            if force or row.embedding_text_hash != text_hash:
+                changed.append((row.id, text, text_hash))
+            elif row.id not in index:
+                unindexed.append(row.id)
+
+        if changed:
+            embeddings = emb_service.embed_texts(
+                [text for _, text, _ in changed], batch_size=batch_size, use_cache=False
+            )
+            db.execute(update(Problem), [
+                {
+                    "id": problem_id,
+                    "embedding": emb_service.serialize_embedding(embedding),
+                    "embedding_text_hash": text_hash,
+                }
+                for (problem_id, _, text_hash), embedding in zip(changed, embeddings)
+            ])
+            db.commit()
+            index.upsert_many([problem_id for problem_id, _, _ in changed], embeddings)
+            embedded += len(changed)
+
+        if unindexed:
+            # Embedded by an earlier run that stopped before saving the index
+            stored = db.query(Problem.id, Problem.embedding).filter(Problem.id.in_(unindexed)).all()
+            stored = [(pid, blob) for pid, blob in stored if blob]
+            if stored:
+                index.upsert_many(
+                    [pid for pid, _ in stored],
+                    np.stack([emb_service.deserialize_embedding(blob) for _, blob in stored])
+                )
+
+        elapsed = time.perf_counter() - start
+        click.echo(f"  ✓ {seen}/{total} scanned, {embedded} embedded ({embedded / elapsed:.1f} rows/s)")
 
-    problems = db.query(Problem).all()
-
-    for i, problem in enumerate(problems, 1):
-        text = f"{problem.title} {problem.tags} {problem.description or ''}"
-        embedding = emb_service.embed_text(text)
-        embedding_blob = emb_service.serialize_embedding(embedding)
+    db.close()
+    index.save(PROBLEM_INDEX_PATH)
+    click.echo(f"✓ Saved vector index ({len(index)} problems) to {PROBLEM_INDEX_PATH}")
+    click.echo(f"✓ All problems embedded! ({embedded} updated, {seen - embedded} unchanged)")
 
-        problem.embedding = embedding_blob
-        db.add(problem)
-        db.commit()
 
-        click.echo(f"  ✓ Embedded ({i}/{len(problems)}): {problem.title}")
+@cli.command()
+@click.option('--dtype', type=click.Choice(list(EmbeddingCodec.DTYPES)), default=EMBEDDING_DTYPE,
+              help='Target storage dtype')
+@click.option('--page-size', default=1000, help='Problems rewritten (and committed) per page')
+@click.option('--vacuum', is_flag=True, help='VACUUM afterwards to reclaim the freed space')
+def migrate_embeddings(dtype, page_size, vacuum):
+    """Rewrite embedding blobs (pickle or another dtype) in the binary format"""
+    db = SessionLocal()
+    rewritten, last_id = 0, 0
+
+    while True:
+        rows = (
+            db.query(Problem.id, Problem.embedding)
+            .filter(Problem.id > last_id)
+            .order_by(Problem.id)
+            .limit(page_size)
+            .all()
+        )
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        updates = [
+            {"id": problem_id, "embedding": EmbeddingCodec.encode(EmbeddingCodec.decode(blob), dtype)}
+            for problem_id, blob in rows
+            if blob and EmbeddingCodec.dtype_of(blob) != dtype
+        ]
+        if updates:
+            db.execute(update(Problem), updates)
+            db.commit()
+            rewritten += len(updates)
+        click.echo(f"  ✓ Rewrote {rewritten} embeddings (up to problem {last_id})")
 
     db.close()
-    click.echo("✓ All problems embedded!")
+    if vacuum:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM"))
+    click.echo(f"✓ Embeddings stored as {dtype} ({rewritten} rewritten)")
 
 
 @cli.command()
@@ -90,7 +190,7 @@ def train_models():
     difficulty_model.build_model(input_dim=X_difficulty.shape[1])
 
     history = difficulty_model.train(X_difficulty, y_difficulty, epochs=50, batch_size=32)
-    difficulty_model.save()
+    difficulty_model.save(export_npz=True)
     click.echo(f"✓ Difficulty model trained and saved to {DIFFICULTY_MODEL_PATH}")
 
     click.echo("\n⏰ Training Hint Timing Model...")
@@ -98,12 +198,27 @@ def train_models():
     hint_timing_model.build_model(input_dim=X_hint_timing.shape[1])
 
     history = hint_timing_model.train(X_hint_timing, y_hint_timing, epochs=50, batch_size=32)
-    hint_timing_model.save()
+    hint_timing_model.save(export_npz=True)
     click.echo(f"✓ Hint timing model trained and saved to {HINT_TIMING_MODEL_PATH}")
 
     click.echo("\n✅ All models trained successfully!")
 
 
+@cli.command()
+def export_models():
+    """Export trained models to .npz for TensorFlow-free serving"""
+    for model_cls, model_path in [
+        (PersonalizedDifficultyModel, DIFFICULTY_MODEL_PATH),
+        (HintTimingModel, HINT_TIMING_MODEL_PATH),
+    ]:
+        if not os.path.exists(model_path):
+            click.echo(f"✗ {model_path} not found (run train-models first)")
+            continue
+        model = model_cls(model_path)
+        model.load()
+        click.echo(f"✓ Exported {model_path} -> {model.export_npz()}")
+
+
 @cli.command()
 @click.option('--user-id', default=1, help='User ID')
 def init_user_predictions(user_id):
@@ -131,6 +246,164 @@ def init_user_predictions(user_id):
     click.echo("✓ Predictions initialized!")
 
 
+_shard_write_lock = None
+
+
+def _init_recompute_worker(write_lock):
+    global _shard_write_lock
+    _shard_write_lock = write_lock
+    # Forked workers must not reuse the parent's pooled SQLite connections
+    engine.dispose(close=False)
+
+
+def _recompute_shard(user_ids: list) -> tuple:
+    """Score a shard in this worker; writes take the shared lock since SQLite has a single writer."""
+    from app.routes import _recompute_predictions_bulk
+
+    db = SessionLocal()
+    try:
+        counts = _recompute_predictions_bulk(user_ids, db, write_lock=_shard_write_lock)
+        return user_ids[0], user_ids[-1], len(user_ids), counts
+    finally:
+        db.close()
+
+
+def _load_checkpoint(path: str, run_key: dict) -> list:
+    """Completed [first_user_id, last_user_id] shard ranges from a previous run with the same key."""
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        checkpoint = json.load(f)
+    return checkpoint["done"] if checkpoint.get("run") == run_key else []
+
+
+def _save_checkpoint(path: str, run_key: dict, done: list):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({"run": run_key, "done": done}, f)
+    os.replace(tmp_path, path)
+
+
+@cli.command()
+@click.option('--since', type=click.DateTime(), default=None,
+              help='Only users with a submission at or after this date/time')
+@click.option('--workers', default=os.cpu_count() or 1, help='Worker processes')
+@click.option('--shard-size', default=200, help='Users per shard')
+@click.option('--checkpoint', default=RECOMPUTE_CHECKPOINT_PATH, help='Progress file used to resume')
+@click.option('--restart', is_flag=True, help='Ignore the checkpoint and recompute every user')
+def recompute_all(since, workers, shard_size, checkpoint, restart):
+    """Recompute predictions for all (or recently active) users in parallel, resumably"""
+    from app.services.model_registry import ModelRegistry
+
+    db = SessionLocal()
+    if since:
+        query = db.query(Submission.user_id).filter(Submission.created_at >= since.isoformat()).distinct()
+    else:
+        query = db.query(User.id)
+    user_ids = sorted(uid for (uid,) in query)
+    db.close()
+
+    # A checkpoint only applies to the same selection and model version
+    ModelRegistry.get("difficulty")
+    run_key = {"since": since.isoformat() if since else None, "model_version": ModelRegistry.version("difficulty")}
+    done = [] if restart else _load_checkpoint(checkpoint, run_key)
+    remaining = [uid for uid in user_ids if not any(lo <= uid <= hi for lo, hi in done)]
+    if done:
+        click.echo(f"Resuming: {len(user_ids) - len(remaining)} users already done")
+
+    shards = [remaining[i:i + shard_size] for i in range(0, len(remaining), shard_size)]
+    click.echo(f"Recomputing {len(remaining)} users in {len(shards)} shards on {workers} workers...")
+
+    start = time.perf_counter()
+    n_done, written = 0, 0
+    write_lock = multiprocessing.Lock()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_recompute_worker,
+                             initargs=(write_lock,)) as pool:
+        futures = [pool.submit(_recompute_shard, shard) for shard in shards]
+        for future in as_completed(futures):
+            first_id, last_id, n_users, counts = future.result()
+            done.append([first_id, last_id])
+            _save_checkpoint(checkpoint, run_key, done)
+
+            n_done += n_users
+            written += counts["written"]
+            rate = n_done / (time.perf_counter() - start)
+            click.echo(f"  ✓ {n_done}/{len(remaining)} users ({rate:.1f} users/s, {written} rows written)")
+
+    click.echo(f"✓ Recomputed {n_done} users in {time.perf_counter() - start:.1f}s")
+
+
+@cli.command()
+@click.option('--concurrency', default=LLM_MAX_CONCURRENCY, help='LLM calls in flight (never more than LLM_MAX_CONCURRENCY)')
+@click.option('--problem-id', type=int, multiple=True, help='Only this problem (repeatable)')
+@click.option('--batch-size', default=50, help='Hints stored per commit')
+@click.option('--force', is_flag=True, help='Regenerate hints that are already up to date')
+def generate_hints(concurrency, problem_id, batch_size, force):
+    """Pre-generate mentor hints for every problem x failure class (the hint library)"""
+    import asyncio
+    from app.services.hint_library import HintLibrary
+    from app.services.llm_client import LLMClient
+    from app.services.mentor_service import MentorService
+    from app.services.solution_analyzer import SolutionAnalyzer
+
+    db = SessionLocal()
+    query = db.query(Problem).order_by(Problem.id)
+    if problem_id:
+        query = query.filter(Problem.id.in_(problem_id))
+    todo = HintLibrary.pending(db, query.all(), force=force)
+    click.echo(f"Generating {len(todo)} hints with up to {concurrency} concurrent calls...")
+
+    mentor = MentorService()
+    limit = asyncio.Semaphore(concurrency)
+
+    async def generate(pid, title, tags, failure_class, inputs_hash):
+        failure_type, analysis = SolutionAnalyzer.FAILURE_CLASSES[failure_class]
+        async with limit:
+            hint = await mentor.request_hint(failure_type, analysis, title, tags)
+        return {"problem_id": pid, "failure_class": failure_class, "hint": hint, "inputs_hash": inputs_hash}
+
+    start = time.perf_counter()
+    futures = [LLMClient.submit(generate(problem.id, problem.title, problem.tags, failure_class, inputs_hash))
+               for problem, failure_class, inputs_hash in todo]
+
+    # Stored batch by batch, so an interrupted run keeps its progress and a re-run only does the rest
+    rows, stored, failed = [], 0, 0
+    for future in as_completed(futures):
+        try:
+            row = future.result()
+        except Exception as e:
+            failed += 1
+            click.echo(f"  ✗ {type(e).__name__}: {e}")
+            continue
+        if not row["hint"]:
+            failed += 1
+            continue
+        rows.append(row)
+        if len(rows) >= batch_size:
+            HintLibrary.store(db, rows)
+            stored += len(rows)
+            rows = []
+            click.echo(f"  ✓ {stored}/{len(todo)} hints ({stored / (time.perf_counter() - start):.1f} hints/s)")
+
+    HintLibrary.store(db, rows)
+    stored += len(rows)
+    db.close()
+    LLMClient.shutdown()
+    click.echo(f"✓ Stored {stored} hints in {time.perf_counter() - start:.1f}s"
+               + (f" ({failed} failed; run again to retry them)" if failed else ""))
+
+
+@cli.command()
+def rebuild_features():
+    """Rebuild per-user, per-tag feature stats from submission history"""
+    from app.services.feature_store import UserFeatureStore
+
+    db = SessionLocal()
+    n_users = UserFeatureStore.rebuild(db)
+    db.close()
+    click.echo(f"✓ Rebuilt tag stats for {n_users} users")
+
+
 @cli.command()
 def seed_problems():
     """Add sample problems to database"""
@@ -1,17 +1,41 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
-from app.config import DATABASE_URL
+from sqlalchemy.pool import QueuePool
+from app.config import DATABASE_URL, SQLITE_PRAGMAS, SQLITE_MMAP_SIZE, SQLITE_CACHE_SIZE_KB, \
+    SQLITE_BUSY_TIMEOUT_SECONDS, DB_POOL_SIZE, DB_MAX_OVERFLOW
 import os
 
 os.makedirs("app/data", exist_ok=True)
 os.makedirs("app/data/models", exist_ok=True)
 os.makedirs("app/data/training", exist_ok=True)
 
+_url = make_url(DATABASE_URL)
+IS_SQLITE = _url.get_backend_name() == "sqlite"
+
+# Pool sizing only exists on QueuePool; e.g. in-memory SQLite gets a per-thread pool that rejects it
+_pool_options = {}
+if issubclass(_url.get_dialect().get_pool_class(_url), QueuePool):
+    _pool_options = {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW}
+
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False}
+    connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_SECONDS} if IS_SQLITE else {},
+    **_pool_options,
 )
 
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not IS_SQLITE or not SQLITE_PRAGMAS:
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints; a power loss may drop the last commits
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")  # negative = KiB, not pages
+    cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -22,3 +46,23 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def upsert_insert(model):
+    """INSERT for the configured backend; supports on_conflict_do_update / on_conflict_do_nothing and .excluded."""
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+
+def create_schema():
+    """Create missing tables, then apply pending migrations (see app/migrations.py); returns their versions."""
+    import app.models  # noqa: F401  (registers every table on Base.metadata)
+    from app.migrations import lock_schema, migrate
+
+    with engine.begin() as conn:
+        lock_schema(conn)
+        Base.metadata.create_all(bind=conn)
+    return migrate(engine)
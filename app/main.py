@@ -1,17 +1,52 @@
+import threading
+
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 
-from app.database import Base, engine
-from app.routes import router
+from app.database import create_schema
+from app.routes import router, recompute_queue, submission_jobs, write_queue
 from app.cli import cli
+from app.services.model_registry import ModelRegistry
+from app.services.code_executor import CodeExecutor
+from app.services.embedding_service import EmbeddingService
+from app.services.llm_client import LLMClient
+from app.config import EXECUTOR_MODE, WARMUP_MODELS
 
-Base.metadata.create_all(bind=engine)
+create_schema()
 
 app = FastAPI(title="CP Mentor API")
 
 app.include_router(router)
 
+
+def warm_up_models():
+    ModelRegistry.load_all()
+    try:
+        EmbeddingService.get_model()
+    except Exception as e:
+        print(f"Warning: Could not load embedding model: {e}")
+
+
+@app.on_event("startup")
+def load_models():
+    # Models load on first use; optionally warm them in the background so the first request doesn't pay for it
+    if WARMUP_MODELS:
+        threading.Thread(target=warm_up_models, name="model-warmup", daemon=True).start()
+    recompute_queue.start()
+    if EXECUTOR_MODE == "warm":
+        CodeExecutor.get_worker_pool()
+
+
+@app.on_event("shutdown")
+def stop_workers():
+    recompute_queue.stop()
+    submission_jobs.shutdown()
+    write_queue.stop()
+    CodeExecutor.shutdown()
+    LLMClient.shutdown()
+
+
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 @app.get("/")
@@ -0,0 +1,93 @@
+from datetime import datetime
+
+from sqlalchemy import inspect, insert, select, text
+
+from app.models import SchemaVersion
+
+
+def _add_embedding_text_hash(conn):
+    if "embedding_text_hash" not in {c["name"] for c in inspect(conn).get_columns("problems")}:
+        conn.execute(text("ALTER TABLE problems ADD COLUMN embedding_text_hash VARCHAR"))
+
+
+def _unique_predictions(conn):
+    # Older databases may hold duplicate rows; keep the newest before adding the unique index
+    conn.execute(text(
+        "DELETE FROM personalized_difficulty_predictions WHERE id NOT IN ("
+        "SELECT MAX(id) FROM personalized_difficulty_predictions GROUP BY user_id, problem_id)"
+    ))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_prediction_user_problem "
+        "ON personalized_difficulty_predictions (user_id, problem_id)"
+    ))
+
+
+def _prediction_probability_index(conn):
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_prediction_user_probability "
+        "ON personalized_difficulty_predictions (user_id, pass_probability, problem_id)"
+    ))
+
+
+def _submission_and_test_indexes(conn):
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_submission_user_problem ON submissions (user_id, problem_id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_problem_test_problem ON problem_tests (problem_id)"))
+
+
+def _problem_features_updated_at(conn):
+    if "features_updated_at" not in {c["name"] for c in inspect(conn).get_columns("problems")}:
+        conn.execute(text("ALTER TABLE problems ADD COLUMN features_updated_at VARCHAR"))
+    conn.execute(text("UPDATE problems SET features_updated_at = :now WHERE features_updated_at IS NULL"),
+                 {"now": datetime.now().isoformat()})
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_problems_features_updated_at ON problems (features_updated_at)"))
+
+
+def _problem_updated_at(conn):
+    if "updated_at" not in {c["name"] for c in inspect(conn).get_columns("problems")}:
+        conn.execute(text("ALTER TABLE problems ADD COLUMN updated_at VARCHAR"))
+    conn.execute(text("UPDATE problems SET updated_at = :now WHERE updated_at IS NULL"),
+                 {"now": datetime.now().isoformat()})
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_problems_updated_at ON problems (updated_at)"))
+
+
+# (version, description, fn(connection)). create_all already builds new databases with every declared column and
+# index, so each step must also be a no-op there; databases from before versioning may have some steps applied
+MIGRATIONS = [
+    (1, "problems.embedding_text_hash column", _add_embedding_text_hash),
+    (2, "unique (user_id, problem_id) on predictions", _unique_predictions),
+    (3, "predictions (user_id, pass_probability, problem_id) index", _prediction_probability_index),
+    (4, "submissions (user_id, problem_id) and problem_tests (problem_id) indexes", _submission_and_test_indexes),
+    (5, "problems.features_updated_at column and index", _problem_features_updated_at),
+    (6, "problems.updated_at column and index", _problem_updated_at),
+]
+
+
+def applied_versions(conn) -> set:
+    return set(conn.execute(select(SchemaVersion.version)).scalars())
+
+
+def lock_schema(conn):
+    """Serialize schema changes across processes until `conn`'s transaction ends; call it first in the transaction.
+
+    Several app processes may start at once: the first one creates and migrates, the others wait, then skip.
+    """
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(4200)"))
+    elif conn.dialect.name == "sqlite":
+        # pysqlite only opens a transaction before DML; take the write lock before reading anything
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def migrate(engine) -> list:
+    """Apply pending migrations in order, one transaction each; returns the versions applied."""
+    applied = []
+    for version, description, fn in MIGRATIONS:
+        with engine.begin() as conn:
+            lock_schema(conn)
+            if version in applied_versions(conn):
+                continue
+            fn(conn)
+            conn.execute(insert(SchemaVersion).values(
+                version=version, description=description, applied_at=datetime.now().isoformat()))
+        applied.append(version)
+    return applied
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, LargeBinary, ForeignKey, Float
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Text, LargeBinary, ForeignKey, Float, Index, event, inspect
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -24,15 +26,36 @@ class Problem(Base):
     tags = Column(String)
     description = Column(Text, nullable=True)
     embedding = Column(LargeBinary)
+    embedding_text_hash = Column(String, nullable=True)  # hash of the text `embedding` was computed from
     correct_solution = Column(Text, nullable=True)
+    features_updated_at = Column(String, nullable=True, index=True)  # last tags/difficulty edit (ProblemFeatureCache)
+    updated_at = Column(String, nullable=True, index=True)  # last edit of any column (predictions ETag)
 
     tests = relationship("ProblemTest", back_populates="problem")
     submissions = relationship("Submission", back_populates="problem")
     predictions = relationship("PersonalizedDifficultyPrediction", back_populates="problem")
 
+    def features_changed(self) -> bool:
+        """Whether tags or difficulty have changes not yet flushed."""
+        attrs = inspect(self).attrs
+        return attrs.tags.history.has_changes() or attrs.difficulty.history.has_changes()
+
+
+@event.listens_for(Problem, "before_insert")
+@event.listens_for(Problem, "before_update")
+def _stamp_problem_features(mapper, connection, target):
+    # Registered with the model so every writer stamps, and other processes see the edit (ProblemFeatureCache)
+    now = datetime.now().isoformat()
+    if target.features_updated_at is None or target.features_changed():
+        target.features_updated_at = now
+    target.updated_at = now
+
 
 class ProblemTest(Base):
     __tablename__ = "problem_tests"
+    __table_args__ = (
+        Index("ix_problem_test_problem", "problem_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     problem_id = Column(Integer, ForeignKey("problems.id"))
@@ -44,6 +67,9 @@ class ProblemTest(Base):
 
 class Submission(Base):
     __tablename__ = "submissions"
+    __table_args__ = (
+        Index("ix_submission_user_problem", "user_id", "problem_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -73,8 +99,32 @@ class UserProfile(Base):
     user = relationship("User", back_populates="user_profiles")
 
 
+class UserTagStats(Base):
+    __tablename__ = "user_tag_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    stats = Column(LargeBinary)  # float64 (3, n_tags): attempts, solved, solve seconds (see UserFeatureStore)
+    updated_at = Column(String)
+
+
+class PredictionRefreshState(Base):
+    __tablename__ = "prediction_refresh_state"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    user_features_hash = Column(String)  # hash of the user feature vector last scored
+    model_version = Column(String)
+    catalog_hash = Column(String)  # hash of the features of problems up to max_problem_id
+    max_problem_id = Column(Integer)
+    updated_at = Column(String)
+
+
 class PersonalizedDifficultyPrediction(Base):
     __tablename__ = "personalized_difficulty_predictions"
+    __table_args__ = (
+        Index("uq_prediction_user_problem", "user_id", "problem_id", unique=True),
+        # Serves the easiest-first listing (and its keyset cursor) straight from the index
+        Index("ix_prediction_user_probability", "user_id", "pass_probability", "problem_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), index=True)
@@ -84,4 +134,54 @@ class PersonalizedDifficultyPrediction(Base):
     updated_at = Column(String)
 
     user = relationship("User", back_populates="predictions")
-    problem = relationship("Problem", back_populates="predictions")
\ No newline at end of file
+    problem = relationship("Problem", back_populates="predictions")
+
+
+class VerdictCacheEntry(Base):
+    __tablename__ = "verdict_cache"
+
+    key = Column(String, primary_key=True)  # sha256 of judge limits + tests + normalized code
+    status = Column(String)
+    failure_analysis = Column(Text, nullable=True)
+    test_results = Column(Text)  # JSON list of per-test results
+    created_at = Column(String)
+
+
+class EmbeddingCacheEntry(Base):
+    __tablename__ = "embedding_cache"
+
+    key = Column(String, primary_key=True)  # sha256 of model name + text
+    embedding = Column(LargeBinary)
+    created_at = Column(String)
+
+
+class LLMResponseCacheEntry(Base):
+    __tablename__ = "llm_response_cache"
+
+    id = Column(Integer, primary_key=True)
+    key = Column(String, index=True)  # sha256 of kind + model + normalized prompt inputs; several rows (variants) per key
+    kind = Column(String)  # "hint" or "explanation"
+    text = Column(Text)
+    created_at = Column(String, index=True)
+
+
+class HintLibraryEntry(Base):
+    __tablename__ = "hint_library"
+    __table_args__ = (
+        Index("uq_hint_library_problem_class", "problem_id", "failure_class", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    problem_id = Column(Integer, ForeignKey("problems.id"))
+    failure_class = Column(String)  # SolutionAnalyzer.FAILURE_CLASSES key
+    hint = Column(Text)
+    inputs_hash = Column(String)  # sha256 of model + prompt inputs; a mismatch means the hint is stale
+    created_at = Column(String)
+
+
+class SchemaVersion(Base):
+    __tablename__ = "schema_version"
+
+    version = Column(Integer, primary_key=True)  # app.migrations.MIGRATIONS entry
+    description = Column(String)
+    applied_at = Column(String)
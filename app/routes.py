@@ -1,33 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, literal, or_, tuple_, update
 from sqlalchemy.orm import Session
 from datetime import datetime
-from app.database import get_db
-from app.models import User, Problem, Submission, UserProfile, PersonalizedDifficultyPrediction
+from app.database import get_db, SessionLocal, upsert_insert
+from app.models import User, Problem, ProblemTest, Submission, UserProfile, PersonalizedDifficultyPrediction, \
+    PredictionRefreshState
 from app.schemas import SubmissionRequest, SubmissionResponse, ProblemRecommendation, UserDifficultyPredictionsResponse, \
-    ProblemWithProbability
+    ProblemWithProbability, SubmissionJobResponse, SubmissionJobStatus, TestResult
 from app.services.code_executor import CodeExecutor
 from app.services.solution_analyzer import SolutionAnalyzer
 from app.services.mentor_service import MentorService
-from app.services.personalized_difficulty_model import PersonalizedDifficultyModel
-from app.services.hint_timing_model import HintTimingModel
-from app.config import DIFFICULTY_MODEL_PATH, HINT_TIMING_MODEL_PATH
+from app.services.llm_client import LLMClient
+from app.services.hint_library import HintLibrary
+from app.services.write_queue import WriteQueue
+from app.services.embedding_service import EmbeddingService
+from app.services.model_registry import ModelRegistry
+from app.services.recompute_queue import RecomputeQueue
+from app.services.submission_jobs import SubmissionJobs
+from app.services.verdict_cache import VerdictCache
+from app.services.feature_store import UserFeatureStore
+from app.services.problem_features import ProblemFeatureCache
+from app.config import RECOMPUTE_WORKERS, SUBMISSION_WORKERS, VERDICT_CACHE_SIZE, VERDICT_CACHE_PERSIST, \
+    PREDICTION_WRITE_THRESHOLD, GROUP_COMMIT, WRITE_BATCH_MAX
+from typing import Optional
 import numpy as np
+import asyncio
+import base64
+import contextlib
+import hashlib
+import json
+import threading
 
 router = APIRouter()
 
 
-def _create_difficulty_features(user_profile, problem) -> np.ndarray:
-    """Create feature vector for difficulty model (problem + user features only)."""
-    # Problem features: 6 tags (one-hot) + 1 difficulty = 7
-    tags_list = [t.strip() for t in problem.tags.split(',')]
-    all_tags = ['array', 'dp', 'graph', 'greedy', 'string', 'math']
-    problem_tags = np.array([1.0 if tag in tags_list else 0.0 for tag in all_tags])
+def _problem_features(problem) -> np.ndarray:
+    """Problem features: 6 tags (one-hot) + 1 difficulty = 7"""
+    return ProblemFeatureCache.problem_vector(problem.tags, problem.difficulty)
+
 
-    difficulty_map = {'easy': 0, 'medium': 1, 'hard': 2}
-    problem_difficulty = np.array([difficulty_map.get(problem.difficulty, 0)])
+def _user_features(user_profile, tag_stats=None) -> np.ndarray:
+    """User features: success per tag (6) + avg_time + avg_edits = 8
 
-    # User features: success per tag (6) + avg_time + avg_edits = 8
-    user_success_per_tag = np.array([0.5] * 6)  # default
+    `tag_stats` is the user's UserFeatureStore array; without it every tag defaults to 0.5.
+    """
+    if tag_stats is not None:
+        user_success_per_tag = UserFeatureStore.success_rates(tag_stats)
+    else:
+        user_success_per_tag = np.array([0.5] * 6)  # default
     user_avg_time = 100.0
     user_avg_edits = 3.0
 
@@ -35,213 +56,671 @@ def _create_difficulty_features(user_profile, problem) -> np.ndarray:
         user_avg_time = user_profile.avg_time_per_solve if user_profile.avg_time_per_solve > 0 else 100.0
         user_avg_edits = user_profile.avg_edits if user_profile.avg_edits > 0 else 3.0
 
-    user_features = np.concatenate([user_success_per_tag, [user_avg_time, user_avg_edits]])
+    return np.concatenate([user_success_per_tag, [user_avg_time, user_avg_edits]])
 
+
+def _create_difficulty_features(user_profile, problem, tag_stats=None) -> np.ndarray:
+    """Create feature vector for difficulty model (problem + user features only)."""
     # Combine: 7 + 8 = 15 features
-    features = np.concatenate([problem_tags, problem_difficulty, user_features])
-    return features
+    return np.concatenate([_problem_features(problem), _user_features(user_profile, tag_stats)])
+
+
+def _create_difficulty_feature_matrix(user_profile, problems, tag_stats=None) -> np.ndarray:
+    """Create the (n_problems, 15) feature matrix for scoring many problems in one model call.
+
+    `problems` is a list of Problem rows or an already-built (n, 7) problem feature matrix.
+    """
+    if isinstance(problems, np.ndarray):
+        problem_matrix = problems
+    else:
+        problem_matrix = np.array([_problem_features(p) for p in problems], dtype=np.float64).reshape(-1, 7)
+    user_matrix = np.broadcast_to(_user_features(user_profile, tag_stats), (problem_matrix.shape[0], 8))
+    return np.hstack([problem_matrix, user_matrix])
+
+
+class RefreshStats:
+    """Cumulative counters for prediction refreshes (exposed on /api/metrics)."""
+
+    FIELDS = ["refreshes", "full", "incremental", "noop", "scored", "written",
+              "skipped_solved", "skipped_clean", "skipped_threshold"]
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def add(self, counts: dict):
+        with self._lock:
+            self._counts["refreshes"] += 1
+            for name, value in counts.items():
+                self._counts[name] += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+
+refresh_stats = RefreshStats()
+
 
+def _hash_array(array: np.ndarray) -> str:
+    return hashlib.sha256(np.ascontiguousarray(array, dtype=np.float64).tobytes()).hexdigest()
 
-def _recompute_all_predictions(user_id: int, db: Session):
-    """Recompute pass probabilities for ALL problems for a user."""
+
+def _recompute_all_predictions(user_id: int, db: Session, full: bool = True) -> dict:
+    """Recompute pass probabilities for a user's unsolved problems.
+
+    With `full=False` only the dirty pairs are re-scored: every unsolved problem when the
+    user's features, the model version or an existing problem's features changed since the
+    last refresh, otherwise just problems without a prediction yet. Predictions that move by
+    less than PREDICTION_WRITE_THRESHOLD are not rewritten. Returns the per-refresh counters.
+    """
+    counts = dict.fromkeys(RefreshStats.FIELDS[1:], 0)
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
-        return
+        return counts
 
     user_profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
-    all_problems = db.query(Problem).all()
+    problem_ids, problem_matrix = ProblemFeatureCache.get(db)
+    if not len(problem_ids):
+        return counts
+
+    difficulty_model = ModelRegistry.get("difficulty")
+    model_version = ModelRegistry.version("difficulty")
+    tag_stats = UserFeatureStore.load(db, user_id)
+    user_features_hash = _hash_array(_user_features(user_profile, tag_stats))
+    max_problem_id = int(problem_ids.max())
+
+    existing = dict(
+        db.query(PersonalizedDifficultyPrediction.problem_id, PersonalizedDifficultyPrediction.pass_probability)
+        .filter(PersonalizedDifficultyPrediction.user_id == user_id)
+        .all()
+    )
+
+    # Solved problems stay pinned at 1.0
+    solved = {
+        pid for (pid,) in db.query(Submission.problem_id)
+        .filter(Submission.user_id == user_id, Submission.status == "accepted")
+        .distinct()
+    }
+    unsolved = ~np.isin(problem_ids, list(solved))
+    counts["skipped_solved"] = int((~unsolved).sum())
+
+    state = db.query(PredictionRefreshState).filter(PredictionRefreshState.user_id == user_id).first()
+    known = problem_ids <= (state.max_problem_id if state and state.max_problem_id is not None else -1)
+    catalog_hash = _hash_array(problem_matrix[known])
+    inputs_changed = (
+        full or state is None
+        or state.user_features_hash != user_features_hash
+        or state.model_version != model_version
+        or state.catalog_hash != catalog_hash
+    )
+
+    if inputs_changed:
+        dirty = unsolved
+    else:
+        dirty = unsolved & ~np.isin(problem_ids, list(existing))
+    counts["skipped_clean"] = int((unsolved & ~dirty).sum())
+    counts["full" if inputs_changed else "incremental"] = 1
+
+    if dirty.any():
+        features = _create_difficulty_feature_matrix(user_profile, problem_matrix[dirty], tag_stats)
+        pass_probs = difficulty_model.predict(features)[:, 0]
+        counts["scored"] = len(pass_probs)
+
+        written = _upsert_predictions(
+            db, user_id, dict(zip(problem_ids[dirty].tolist(), pass_probs.tolist())),
+            existing=existing, threshold=0.0 if full else PREDICTION_WRITE_THRESHOLD
+        )
+        counts["written"] = written
+        counts["skipped_threshold"] = counts["scored"] - written
+    else:
+        counts["noop"] = 1
+
+    # Re-pin solved problems whose prediction was overwritten by an older recompute
+    unpinned = {pid: 1.0 for pid in solved if pid in existing and existing[pid] != 1.0}
+    if unpinned:
+        counts["written"] += _upsert_predictions(db, user_id, unpinned, existing=existing)
+
+    db.merge(PredictionRefreshState(
+        user_id=user_id,
+        user_features_hash=user_features_hash,
+        model_version=model_version,
+        catalog_hash=_hash_array(problem_matrix),
+        max_problem_id=max_problem_id,
+        updated_at=datetime.now().isoformat()
+    ))
+    db.commit()
 
-    difficulty_model = PersonalizedDifficultyModel(DIFFICULTY_MODEL_PATH)
+    refresh_stats.add(counts)
+    return counts
 
-    for problem in all_problems:
-        features = _create_difficulty_features(user_profile, problem)
-        pass_prob = float(difficulty_model.predict(features.reshape(1, -1))[0][0])
 
-        prediction = db.query(PersonalizedDifficultyPrediction).filter(
-            PersonalizedDifficultyPrediction.user_id == user_id,
-            PersonalizedDifficultyPrediction.problem_id == problem.id
-        ).first()
+def _upsert_predictions(db: Session, user_id: int, pass_probs: dict, existing: dict = None,
+                        threshold: float = 0.0) -> int:
+    """Write {problem_id: pass_probability} for a user with one bulk INSERT ... ON CONFLICT DO UPDATE.
 
-        if not prediction:
-            prediction = PersonalizedDifficultyPrediction(
-                user_id=user_id,
-                problem_id=problem.id,
-                pass_probability=pass_prob,
-                created_at=datetime.now().isoformat(),
-                updated_at=datetime.now().isoformat()
-            )
-            db.add(prediction)
-        else:
-            prediction.pass_probability = pass_prob
-            prediction.updated_at = datetime.now().isoformat()
-            db.add(prediction)
+    Rows whose stored probability is within `threshold` of the new one are skipped. Returns rows written.
+    """
+    if existing is None:
+        existing = dict(
+            db.query(PersonalizedDifficultyPrediction.problem_id, PersonalizedDifficultyPrediction.pass_probability)
+            .filter(PersonalizedDifficultyPrediction.user_id == user_id)
+            .all()
+        )
 
-    db.commit()
+    now = datetime.now().isoformat()
+    rows = [
+        {
+            "user_id": user_id,
+            "problem_id": problem_id,
+            "pass_probability": pass_prob,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for problem_id, pass_prob in pass_probs.items()
+        if existing.get(problem_id) is None
+        or existing[problem_id] != pass_prob and abs(existing[problem_id] - pass_prob) >= threshold
+    ]
+    if not rows:
+        return 0
+
+    db.execute(_prediction_upsert_stmt(), rows)
+    return len(rows)
+
+
+def _prediction_upsert_stmt():
+    stmt = upsert_insert(PersonalizedDifficultyPrediction)
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id", "problem_id"],
+        set_={
+            "pass_probability": stmt.excluded.pass_probability,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+
+
+BULK_MAX_ROWS = 262144  # feature rows per model call in _recompute_predictions_bulk
+BULK_WRITE_ROWS = 20000  # prediction rows per INSERT (and commit) in _recompute_predictions_bulk
+
+
+def _recompute_predictions_bulk(user_ids: list, db: Session, write_lock=None) -> dict:
+    """Full recompute for many users: batched inference, with the writes streamed in BULK_WRITE_ROWS chunks.
+
+    Same result as `_recompute_all_predictions(user_id, db)` for each user: solved problems aren't
+    scored, and an existing prediction for one is re-pinned to 1.0. Users are processed in groups of
+    one model call; a group's refresh state is written after all of its predictions, so an
+    interrupted run is simply redone. `write_lock` serializes each write with other processes sharing
+    the SQLite file. Returns counters summed over the users.
+    """
+    counts = dict.fromkeys(RefreshStats.FIELDS[1:], 0)
+    user_ids = [uid for (uid,) in db.query(User.id).filter(User.id.in_(user_ids)).order_by(User.id)]
+    problem_ids, problem_matrix = ProblemFeatureCache.get(db)
+    if not user_ids or not len(problem_ids):
+        return counts
+
+    difficulty_model = ModelRegistry.get("difficulty")
+    model_version = ModelRegistry.version("difficulty")
+    profiles = {p.user_id: p for p in db.query(UserProfile).filter(UserProfile.user_id.in_(user_ids))}
+    tag_stats = UserFeatureStore.load_many(db, user_ids)
+
+    solved = {}
+    for uid, pid in db.query(Submission.user_id, Submission.problem_id).filter(
+        Submission.user_id.in_(user_ids), Submission.status == "accepted"
+    ).distinct():
+        solved.setdefault(uid, set()).add(pid)
+
+    user_vectors = np.array([_user_features(profiles.get(uid), tag_stats[uid]) for uid in user_ids])
+    n_problems = len(problem_ids)
+    users_per_call = max(1, BULK_MAX_ROWS // n_problems)
+    now = datetime.now().isoformat()
+    problem_id_list = problem_ids.tolist()
+    catalog_hash = _hash_array(problem_matrix)
+    max_problem_id = int(problem_ids.max())
+
+    state_stmt = upsert_insert(PredictionRefreshState)
+    state_stmt = state_stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={c: state_stmt.excluded[c] for c in
+              ("user_features_hash", "model_version", "catalog_hash", "max_problem_id", "updated_at")},
+    )
+
+    def write(rows: list, state_rows: list = None):
+        with write_lock or contextlib.nullcontext():
+            if rows:
+                db.execute(_prediction_upsert_stmt(), rows)
+            if state_rows:
+                db.execute(state_stmt, state_rows)
+            db.commit()
+        counts["written"] += len(rows)
+
+    for start in range(0, len(user_ids), users_per_call):
+        chunk = slice(start, start + users_per_call)
+        chunk_user_ids, chunk_users = user_ids[chunk], user_vectors[chunk]
+        features = np.hstack([
+            np.tile(problem_matrix, (len(chunk_users), 1)),
+            np.repeat(chunk_users, n_problems, axis=0),
+        ])
+        pass_probs = difficulty_model.predict(features)[:, 0].reshape(len(chunk_users), n_problems)
+        del features
+
+        # Only this group's stored predictions are held in memory
+        existing = {}
+        for uid, pid, prob in db.query(
+            PersonalizedDifficultyPrediction.user_id,
+            PersonalizedDifficultyPrediction.problem_id,
+            PersonalizedDifficultyPrediction.pass_probability
+        ).filter(PersonalizedDifficultyPrediction.user_id.in_(chunk_user_ids)):
+            existing[(uid, pid)] = prob
+
+        rows = []
+        for uid, probs in zip(chunk_user_ids, pass_probs.tolist()):
+            user_solved = solved.get(uid, set())
+            for pid, prob in zip(problem_id_list, probs):
+                stored = existing.get((uid, pid))
+                if pid in user_solved:
+                    counts["skipped_solved"] += 1
+                    if stored is None or stored == 1.0:
+                        continue
+                    prob = 1.0  # re-pin
+                else:
+                    counts["scored"] += 1
+                    if stored == prob:
+                        counts["skipped_threshold"] += 1  # unchanged, not rewritten
+                        continue
+                rows.append({"user_id": uid, "problem_id": pid, "pass_probability": prob,
+                             "created_at": now, "updated_at": now})
+                if len(rows) >= BULK_WRITE_ROWS:
+                    write(rows)
+                    rows = []
+
+        write(rows, [
+            {
+                "user_id": uid,
+                "user_features_hash": _hash_array(vector),
+                "model_version": model_version,
+                "catalog_hash": catalog_hash,
+                "max_problem_id": max_problem_id,
+                "updated_at": now,
+            }
+            for uid, vector in zip(chunk_user_ids, chunk_users)
+        ])
 
+    counts["full"] = len(user_ids)
+    return counts
 
-@router.post("/api/mentor/submit/", response_model=SubmissionResponse)
-def submit_solution(request: SubmissionRequest, db: Session = Depends(get_db)):
-    """Submit code and get feedback."""
+
+def _recompute_predictions_job(user_id: int):
+    """Background job: recompute a user's predictions in its own session."""
+    db = SessionLocal()
     try:
-        user = db.query(User).filter(User.id == request.user_id).first()
-        if not user:
-            raise HTTPException(status_code=400, detail="User not found")
+        _recompute_all_predictions(user_id, db, full=False)
+    finally:
+        db.close()
 
-        problem = db.query(Problem).filter(Problem.id == request.problem_id).first()
-        if not problem:
-            raise HTTPException(status_code=400, detail="Problem not found")
 
-        tests = [(t.input_data, t.expected_output) for t in problem.tests]
+recompute_queue = RecomputeQueue(_recompute_predictions_job, n_workers=RECOMPUTE_WORKERS)
 
-        executor = CodeExecutor()
-        status, failure_analysis = executor.classify_failure(request.code, tests)
+write_queue = WriteQueue(SessionLocal, max_batch=WRITE_BATCH_MAX)
 
-        submission = Submission(
-            user_id=request.user_id,
-            problem_id=request.problem_id,
-            code=request.code,
-            status=status,
-            failure_analysis=failure_analysis,
-            time_spent_seconds=request.time_spent_seconds,
-            created_at=datetime.now().isoformat()
+
+verdict_cache = VerdictCache(
+    max_size=VERDICT_CACHE_SIZE,
+    persist=VERDICT_CACHE_PERSIST,
+    judge_fingerprint=json.dumps({"timeout": CodeExecutor.TIMEOUT, **CodeExecutor.resource_limits()}, sort_keys=True)
+)
+
+
+def _judge_with_cache(code: str, tests: list, on_test=None) -> tuple:
+    """Judge via the verdict cache; a hit replays the stored per-test results without running anything."""
+    key = verdict_cache.make_key(tests, code)
+    exact_key = verdict_cache.make_key(tests, code, exact=True) if key else None
+    cached = (verdict_cache.get(key) or verdict_cache.get(exact_key)) if key else None
+    if cached is not None:
+        if on_test:
+            for test_result in cached[2]:
+                on_test(test_result)
+        return cached
+
+    verdict = CodeExecutor.judge(code, tests, on_test=on_test)
+    if key:
+        verdict_cache.put(exact_key if verdict_cache.needs_exact_key(verdict) else key, verdict)
+    return verdict
+
+
+def _write(db: Session, fn):
+    """Run a write job `fn(session)`: through the group-commit writer, or on `db` with GROUP_COMMIT off."""
+    if GROUP_COMMIT:
+        return write_queue.run(fn)
+    result = fn(db)
+    db.commit()
+    return result
+
+
+def _record_submission(db: Session, request: SubmissionRequest, user_id: int, problem_id: int, problem_tags: str,
+                       status: str, failure_analysis: str, hint_given: bool) -> int:
+    """Store a judged submission: the submission row, tag stats, profile and (if accepted) the pinned prediction.
+
+    Returns the submission id. Doesn't commit; may be re-run after a rollback (see WriteQueue).
+    """
+    is_accepted = (status == "accepted")
+    now = datetime.now().isoformat()
+
+    submission = Submission(
+        user_id=user_id,
+        problem_id=problem_id,
+        code=request.code,
+        status=status,
+        failure_analysis=failure_analysis,
+        time_spent_seconds=request.time_spent_seconds,
+        hint_given=1 if hint_given else 0,
+        created_at=now
+    )
+    db.add(submission)
+
+    # Per-tag stats for the difficulty features
+    UserFeatureStore.record_submission(db, user_id, problem_tags, is_accepted, request.time_spent_seconds,
+                                       commit=False)
+
+    # Update user profile in one UPDATE; SET expressions read the pre-update values, so concurrent submits can't lose counts
+    db.execute(
+        upsert_insert(UserProfile)
+        .values(user_id=user_id, total_solved=0, total_attempts=0, avg_time_per_solve=0.0, avg_edits=0.0,
+                updated_at=now)
+        .on_conflict_do_nothing(index_elements=["user_id"])
+    )
+    solved_time = request.time_spent_seconds if is_accepted and request.time_spent_seconds > 0 else None
+    edits = 0 if is_accepted else np.random.poisson(3)
+    db.execute(
+        update(UserProfile)
+        .where(UserProfile.user_id == user_id)
+        .values(
+            total_attempts=UserProfile.total_attempts + 1,
+            total_solved=UserProfile.total_solved + (1 if is_accepted else 0),
+            avg_time_per_solve=(
+                (UserProfile.avg_time_per_solve * UserProfile.total_solved + solved_time)
+                / (UserProfile.total_solved + 1)
+                if solved_time is not None else UserProfile.avg_time_per_solve
+            ),
+            avg_edits=(
+                (UserProfile.avg_edits * UserProfile.total_attempts + int(edits))
+                / (UserProfile.total_attempts + 1)
+                if not is_accepted else UserProfile.avg_edits
+            ),
+            updated_at=now
+        )
+    )
+
+    # If accepted, mark prediction as 100% (they solved it)
+    if is_accepted:
+        db.execute(
+            update(PersonalizedDifficultyPrediction)
+            .where(PersonalizedDifficultyPrediction.user_id == user_id,
+                   PersonalizedDifficultyPrediction.problem_id == problem_id)
+            .values(pass_probability=1.0, updated_at=now)
         )
-        db.add(submission)
-        db.commit()
-
-        is_accepted = (status == "accepted")
-
-        # Update user profile
-        user_profile = db.query(UserProfile).filter(UserProfile.user_id == user.id).first()
-        if not user_profile:
-            user_profile = UserProfile(user_id=user.id, updated_at=datetime.now().isoformat())
-            db.add(user_profile)
-
-        user_profile.total_attempts += 1
-        if is_accepted:
-            user_profile.total_solved += 1
-            if request.time_spent_seconds > 0:
-                current_avg = user_profile.avg_time_per_solve * (user_profile.total_solved - 1)
-                user_profile.avg_time_per_solve = (current_avg + request.time_spent_seconds) / user_profile.total_solved
-
-        # Update avg_edits
-        if not is_accepted:
-            current_edits = user_profile.avg_edits * (user_profile.total_attempts - 1)
-            user_profile.avg_edits = (current_edits + np.random.poisson(3)) / user_profile.total_attempts
-
-        user_profile.updated_at = datetime.now().isoformat()
-        db.add(user_profile)
-        db.commit()
-
-        # If accepted, mark prediction as 100% (they solved it) - DO THIS FIRST
-        if is_accepted:
-            prediction = db.query(PersonalizedDifficultyPrediction).filter(
-                PersonalizedDifficultyPrediction.user_id == user.id,
-                PersonalizedDifficultyPrediction.problem_id == problem.id
-            ).first()
-            if prediction:
-                prediction.pass_probability = 1.0
-                prediction.updated_at = datetime.now().isoformat()
-                db.add(prediction)
-            db.commit()
-        else:
-            # Only recompute if NOT accepted
-            try:
-                _recompute_all_predictions(user.id, db)
-            except Exception as e:
-                print(f"Warning: Could not recompute predictions: {e}")
 
-        # Get current pass probability on this problem
-        if is_accepted:
-            pass_prob_on_this = 1.0  # They passed it
-        else:
-            prediction = db.query(PersonalizedDifficultyPrediction).filter(
-                PersonalizedDifficultyPrediction.user_id == user.id,
-                PersonalizedDifficultyPrediction.problem_id == problem.id
-            ).first()
-            pass_prob_on_this = prediction.pass_probability if prediction else 0.5
+    db.flush()
+    return submission.id
 
-        # Hint logic (with error handling)
-        hint = ""
-        hint_given = False
 
-        if not is_accepted and status != "syntax":
-            try:
-                if problem.correct_solution:
-                    analyzer = SolutionAnalyzer()
-                    detailed_analysis = analyzer.analyze_mistake(request.code, problem.correct_solution, status)
-                    failure_for_embedding = detailed_analysis
-                else:
-                    failure_for_embedding = failure_analysis
+def _mark_hint_given(db: Session, submission_id: int):
+    """Flag a recorded submission as having received a hint. Doesn't commit."""
+    db.query(Submission).filter(Submission.id == submission_id).update({"hint_given": 1},
+                                                                       synchronize_session=False)
+
+
+def _process_submission(request: SubmissionRequest, db: Session, on_test=None) -> SubmissionResponse:
+    """Judge a submission, record it and build the mentor feedback.
 
-                # Predict if hint should be given (with error handling)
-                try:
-                    hint_timing_model = HintTimingModel(HINT_TIMING_MODEL_PATH)
-                    hint_features = np.array([[float(request.time_spent_seconds), np.random.poisson(3)]])
-                    hint_prob = float(hint_timing_model.predict(hint_features)[0][0])
+    `on_test(test_result)` is forwarded to the judge for per-test progress reporting.
+    """
+    user = db.query(User).filter(User.id == request.user_id).first()
+    if not user:
+        raise HTTPException(status_code=400, detail="User not found")
+
+    problem = db.query(Problem).filter(Problem.id == request.problem_id).first()
+    if not problem:
+        raise HTTPException(status_code=400, detail="Problem not found")
 
-                    if hint_prob > 0.5:
-                        mentor = MentorService()
-                        hint = mentor.generate_hint(
+    tests = [(t.input_data, t.expected_output) for t in problem.tests]
+
+    status, failure_analysis, test_results = _judge_with_cache(request.code, tests, on_test=on_test)
+
+    is_accepted = (status == "accepted")
+
+    # Current pass probability on this problem, read before the background recompute can change it
+    if is_accepted:
+        pass_prob_on_this = 1.0  # They passed it
+    else:
+        prediction = db.query(PersonalizedDifficultyPrediction).filter(
+            PersonalizedDifficultyPrediction.user_id == user.id,
+            PersonalizedDifficultyPrediction.problem_id == problem.id
+        ).first()
+        pass_prob_on_this = prediction.pass_probability if prediction else 0.5
+
+    # Record the verdict before the slow mentor work, group-committed with concurrent submissions by the
+    # writer thread; whether a hint was given is filled in by a follow-up job below
+    user_id, problem_id, problem_tags = user.id, problem.id, problem.tags
+    submission_id = _write(db, lambda session: _record_submission(session, request, user_id, problem_id, problem_tags,
+                                                                  status, failure_analysis, False))
+
+    if not is_accepted:
+        # Only recompute if NOT accepted; runs in the background so the verdict isn't delayed
+        recompute_queue.enqueue(user_id)
+
+    # Hint logic (with error handling)
+    hint = ""
+    hint_given = False
+    hint_future = None
+    mentor = MentorService()
+
+    if not is_accepted and status != "syntax":
+        try:
+            if problem.correct_solution:
+                analyzer = SolutionAnalyzer()
+                detailed_analysis = analyzer.analyze_mistake(request.code, problem.correct_solution, status)
+                failure_for_embedding = detailed_analysis
+            else:
+                failure_for_embedding = failure_analysis
+
+            # Predict if hint should be given (with error handling)
+            try:
+                hint_timing_model = ModelRegistry.get("hint_timing")
+                hint_features = np.array([[float(request.time_spent_seconds), np.random.poisson(3)]])
+                hint_prob = float(hint_timing_model.predict(hint_features)[0][0])
+
+                if hint_prob > 0.5:
+                    hint = HintLibrary.lookup(db, problem, status, failure_for_embedding)
+                    if hint:
+                        hint_given = True
+                    else:
+                        # Nothing pre-generated fits: ask the LLM, on its loop, while recommendations are prepared below
+                        hint_future = LLMClient.submit(mentor.generate_hint_async(
                             failure_type=status,
                             failure_analysis=failure_for_embedding,
                             problem_title=problem.title,
                             problem_tags=problem.tags
-                        )
-                        hint_given = True
-                        submission.hint_given = 1
-                        db.add(submission)
-                        db.commit()
-                except Exception as e:
-                    print(f"Warning: Could not generate hint: {e}")
-                    hint = "Review the problem requirements carefully."
+                        ))
             except Exception as e:
-                print(f"Warning: Hint generation failed: {e}")
-                hint = "Keep practicing!"
+                print(f"Warning: Could not generate hint: {e}")
+                hint = "Review the problem requirements carefully."
+        except Exception as e:
+            print(f"Warning: Hint generation failed: {e}")
+            hint = "Keep practicing!"
 
-        # Get recommendations (with error handling)
+    # Get recommendations (with error handling)
+    rec_response = []
+    explanation = "Keep practicing!"
+
+    try:
+        rec_problems, explanation = mentor.recommend_problems(
+            failure_analysis=failure_analysis,
+            current_problem=problem,
+            is_accepted=is_accepted,
+            db=db,
+            user_id=user.id
+        )
+
+        rec_response = [
+            ProblemRecommendation(
+                id=p.id,
+                title=p.title,
+                difficulty=p.difficulty,
+                tags=p.tags
+            )
+            for p in rec_problems
+        ]
+    except Exception as e:
+        print(f"Warning: Could not get recommendations: {e}")
         rec_response = []
         explanation = "Keep practicing!"
 
+    if hint_future is not None:
         try:
-            mentor = MentorService()
-            rec_problems, explanation = mentor.recommend_problems(
-                failure_analysis=failure_analysis,
-                current_problem=problem,
-                is_accepted=is_accepted,
-                db=db,
-                user_id=user.id
-            )
-
-            rec_response = [
-                ProblemRecommendation(
-                    id=p.id,
-                    title=p.title,
-                    difficulty=p.difficulty,
-                    tags=p.tags
-                )
-                for p in rec_problems
-            ]
+            hint = hint_future.result()
+            hint_given = True
         except Exception as e:
-            print(f"Warning: Could not get recommendations: {e}")
-            rec_response = []
-            explanation = "Keep practicing!"
-
-        return SubmissionResponse(
-            success=True,
-            status=status,
-            hint=hint,
-            hint_given=hint_given,
-            pass_probability_on_this=pass_prob_on_this,
-            recommendations=rec_response,
-            explanation=explanation
-        )
+            print(f"Warning: Could not generate hint: {e}")
+            hint = "Review the problem requirements carefully."
+
+    if hint_given:
+        _write(db, lambda session: _mark_hint_given(session, submission_id))
+
+    return SubmissionResponse(
+        success=True,
+        status=status,
+        hint=hint,
+        hint_given=hint_given,
+        pass_probability_on_this=pass_prob_on_this,
+        recommendations=rec_response,
+        explanation=explanation,
+        tests=[TestResult(**r) for r in test_results]
+    )
+
+
 
+@router.post("/api/mentor/submit/", response_model=SubmissionResponse)
+def submit_solution(request: SubmissionRequest, db: Session = Depends(get_db)):
+    """Submit code and get feedback."""
+    try:
+        return _process_submission(request, db)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+submission_jobs = SubmissionJobs(n_workers=SUBMISSION_WORKERS)
+
+SSE_POLL_INTERVAL = 0.1
+
+
+def _submission_job(request: SubmissionRequest, emit) -> dict:
+    """Async submission job: judge with per-test progress events in its own session."""
+    db = SessionLocal()
+    try:
+        total_tests = db.query(ProblemTest).filter(ProblemTest.problem_id == request.problem_id).count()
+        emit("judging", {"total_tests": total_tests})
+
+        result = _process_submission(
+            request, db,
+            on_test=lambda test_result: emit("test", test_result)
+        )
+        return result.model_dump()
+    finally:
+        db.close()
+
+
+@router.post("/api/mentor/submit/async", response_model=SubmissionJobResponse, status_code=202)
+def submit_solution_async(request: SubmissionRequest, db: Session = Depends(get_db)):
+    """Queue a submission and return its job id; follow it via /events (SSE) or by polling."""
+    if not db.query(User).filter(User.id == request.user_id).first():
+        raise HTTPException(status_code=400, detail="User not found")
+    if not db.query(Problem).filter(Problem.id == request.problem_id).first():
+        raise HTTPException(status_code=400, detail="Problem not found")
+
+    job_id = submission_jobs.submit(lambda emit: _submission_job(request, emit))
+    return SubmissionJobResponse(job_id=job_id, status="queued")
+
+
+@router.get("/api/mentor/submissions/{job_id}", response_model=SubmissionJobStatus)
+def get_submission_job(job_id: str):
+    """Poll an async submission's progress and final result."""
+    job = submission_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Submission job not found")
+
+    total_tests = None
+    tests = []
+    for event in job["events"]:
+        if event["event"] == "judging":
+            total_tests = event["data"]["total_tests"]
+        elif event["event"] == "test":
+            tests.append(TestResult(**event["data"]))
+
+    return SubmissionJobStatus(
+        job_id=job_id,
+        status=job["status"],
+        total_tests=total_tests,
+        tests=sorted(tests, key=lambda t: t.index),
+        result=job["result"],
+        error=job["error"]
+    )
+
+
+@router.get("/api/mentor/submissions/{job_id}/events")
+async def stream_submission_events(job_id: str, request: Request):
+    """Server-Sent Events: judging, test (one per finished test), then result or error."""
+    if not submission_jobs.get(job_id):
+        raise HTTPException(status_code=404, detail="Submission job not found")
+
+    # Resume after the last event a reconnecting EventSource already received
+    last_event_id = request.headers.get("last-event-id", "")
+    cursor = int(last_event_id) + 1 if last_event_id.isdigit() else 0
+
+    async def event_stream():
+        nonlocal cursor
+        while True:
+            events, finished = submission_jobs.events_since(job_id, cursor)
+            for event in events:
+                yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+                cursor = event["id"] + 1
+            if finished or await request.is_disconnected():
+                return
+            await asyncio.sleep(SSE_POLL_INTERVAL)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/api/health")
+def health():
+    """Service health, including which model versions are loaded"""
+    return {
+        "status": "ok",
+        "models": ModelRegistry.status(),
+    }
+
+
+@router.get("/api/metrics")
+def metrics():
+    """Background queue and cache metrics"""
+    return {
+        "recompute_queue": recompute_queue.metrics(),
+        "write_queue": write_queue.metrics(),
+        "prediction_refresh": refresh_stats.snapshot(),
+        "verdict_cache": verdict_cache.stats(),
+        "embedding_cache": EmbeddingService.cache_stats(),
+        "llm": LLMClient.stats(),
+        "llm_cache": {"hint": MentorService.hint_cache.stats(),
+                      "explanation": MentorService.explanation_cache.stats()},
+        "hint_library": HintLibrary.stats(),
+    }
+
+
 @router.get("/api/problems")
 def get_all_problems(db: Session = Depends(get_db)):
     """Get all problems"""
@@ -280,40 +759,128 @@ def get_problem(problem_id: int, db: Session = Depends(get_db)):
     }
 
 
+def _encode_prediction_cursor(pass_probability: float, problem_id: int) -> str:
+    raw = json.dumps([pass_probability, problem_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_prediction_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        pass_probability, problem_id = json.loads(raw)
+        return float(pass_probability), int(problem_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [c.strip().removeprefix("W/") for c in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
 @router.get("/api/user/{user_id}/difficulty-predictions", response_model=UserDifficultyPredictionsResponse)
-def get_user_difficulty_predictions(user_id: int, db: Session = Depends(get_db)):
-    """Get all problems with pass probabilities for a user, sorted by probability (easiest first)."""
+def get_user_difficulty_predictions(user_id: int, request: Request, response: Response,
+                                    limit: int = Query(100, ge=1, le=1000), offset: int = Query(0, ge=0),
+                                    cursor: Optional[str] = None, tag: Optional[str] = None,
+                                    difficulty: Optional[str] = None, q: Optional[str] = None,
+                                    min_probability: Optional[float] = Query(None, ge=0.0, le=1.0),
+                                    max_probability: Optional[float] = Query(None, ge=0.0, le=1.0),
+                                    include_total: bool = False,
+                                    db: Session = Depends(get_db)):
+    """Get a page of problems with pass probabilities for a user, sorted by probability (easiest first).
+
+    Page with `limit` + `offset`, or with `cursor` (the previous page's `next_cursor`), which stays
+    cheap deep into the list. `q` matches a problem id, or part of a title or tag. `total` is counted on the first page only (or with include_total=true);
+    later pages return null. The response carries an ETag; a matching If-None-Match gets a 304.
+    """
     try:
+        if cursor and offset:
+            raise HTTPException(status_code=400, detail="Use either offset or cursor, not both")
+
         user = db.query(User).filter(User.id == user_id).first()
         if not user:
             raise HTTPException(status_code=400, detail="User not found")
 
-        predictions = db.query(PersonalizedDifficultyPrediction).filter(
-            PersonalizedDifficultyPrediction.user_id == user_id
-        ).all()
+        P = PersonalizedDifficultyPrediction
+        count, last_update = db.query(func.count(P.id), func.max(P.updated_at)).filter(P.user_id == user_id).one()
+        refresh_pending = recompute_queue.is_pending(user_id)
 
-        if not predictions:
+        if not count and not refresh_pending:
             raise HTTPException(status_code=400,
                                 detail="No predictions found. Train models and submit solutions first.")
 
-        # Sort by pass_probability descending (easiest first)
+        # Every prediction write stamps updated_at, so (count, last update) versions the user's list; problem
+        # edits (titles included) stamp Problem.updated_at
+        problems_updated = db.query(func.max(Problem.updated_at)).scalar()
+        version = [user_id, count, last_update, refresh_pending, ProblemFeatureCache.signature(db), problems_updated,
+                   limit, offset, cursor, include_total, tag, difficulty, q, min_probability, max_probability]
+        etag = 'W/"%s"' % hashlib.sha256(json.dumps(version, default=str).encode()).hexdigest()[:32]
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+        query = db.query(P.problem_id, P.pass_probability, Problem.title, Problem.difficulty, Problem.tags) \
+            .join(Problem, Problem.id == P.problem_id) \
+            .filter(P.user_id == user_id)
+        if tag:
+            # tags is a comma-separated string; pad it so "dp" never matches inside another tag
+            padded_tags = literal(",") + func.replace(Problem.tags, " ", "") + literal(",")
+            query = query.filter(padded_tags.like(f"%,{tag.strip()},%"))
+        if difficulty:
+            query = query.filter(Problem.difficulty == difficulty)
+        term = (q or "").strip().lower()
+        if term:
+            # Substring of the title or tags (LIKE wildcards in the term taken literally), or the exact id
+            pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            matches = [func.lower(Problem.title).like(pattern, escape="\\"),
+                       func.lower(Problem.tags).like(pattern, escape="\\")]
+            if term.isdigit():
+                matches.append(Problem.id == int(term))
+            query = query.filter(or_(*matches))
+        if min_probability is not None:
+            query = query.filter(P.pass_probability >= min_probability)
+        if max_probability is not None:
+            query = query.filter(P.pass_probability <= max_probability)
+
+        # Counting scans every match, so later pages skip it unless asked
+        total = query.count() if include_total or (not cursor and not offset) else None
+
+        # Ties broken by problem_id in the same direction, so the order is a single backwards index scan
+        page = query.order_by(P.pass_probability.desc(), P.problem_id.desc())
+        if cursor:
+            page = page.filter(tuple_(P.pass_probability, P.problem_id) < tuple_(*_decode_prediction_cursor(cursor)))
+        else:
+            page = page.offset(offset)
+        rows = page.limit(limit + 1).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = _encode_prediction_cursor(rows[-1].pass_probability, rows[-1].problem_id)
+
         problems_with_probs = [
             ProblemWithProbability(
-                id=p.problem.id,
-                title=p.problem.title,
-                difficulty=p.problem.difficulty,
-                tags=p.problem.tags,
-                pass_probability=round(p.pass_probability, 3)
+                id=row.problem_id,
+                title=row.title,
+                difficulty=row.difficulty,
+                tags=row.tags,
+                pass_probability=round(row.pass_probability, 3)
             )
-            for p in sorted(predictions, key=lambda x: x.pass_probability, reverse=True)
+            for row in rows
         ]
 
         return UserDifficultyPredictionsResponse(
             user_id=user_id,
-            problems=problems_with_probs
+            problems=problems_with_probs,
+            refresh_pending=refresh_pending,
+            total=total,
+            next_cursor=next_cursor
         )
 
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 
 class ProblemRecommendation(BaseModel):
@@ -24,6 +24,14 @@ class SubmissionRequest(BaseModel):
     time_spent_seconds: int = 0
 
 
+class TestResult(BaseModel):
+    index: int
+    status: str  # passed, cancelled, or a failure status (runtime, tle, mle, wrong_answer)
+    wall_time_ms: Optional[float] = None
+    cpu_time_ms: Optional[float] = None
+    max_rss_kb: Optional[int] = None
+
+
 class SubmissionResponse(BaseModel):
     success: bool
     status: str
@@ -32,8 +40,27 @@ class SubmissionResponse(BaseModel):
     pass_probability_on_this: float
     recommendations: List[ProblemRecommendation]
     explanation: str
+    tests: List[TestResult] = []
 
 
 class UserDifficultyPredictionsResponse(BaseModel):
     user_id: int
     problems: List[ProblemWithProbability]  # sorted by pass_probability (easiest first)
+    refresh_pending: bool = False  # a background recompute is queued or running
+    total: Optional[int] = None  # predictions matching the filters; set on the first page or with include_total
+    next_cursor: Optional[str] = None  # pass as `cursor` for the next page; None on the last page
+
+
+
+class SubmissionJobResponse(BaseModel):
+    job_id: str
+    status: str
+
+
+class SubmissionJobStatus(BaseModel):
+    job_id: str
+    status: str  # queued, running, done, failed
+    total_tests: Optional[int] = None
+    tests: List[TestResult]
+    result: Optional[SubmissionResponse] = None
+    error: Optional[str] = None
@@ -1,11 +1,89 @@
+import os
+import select
+import selectors
+import signal
 import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from app.config import JUDGE_MAX_WORKERS, JUDGE_PARALLEL, EXECUTOR_MODE, WORKER_MAX_RUNS, JUDGE_CPU_SECONDS, \
+    JUDGE_MEMORY_LIMIT_MB, JUDGE_MAX_OPEN_FILES, JUDGE_MAX_PROCESSES, JUDGE_MAX_OUTPUT_KB
+from app.services.worker_pool import WarmWorkerPool, JUDGE_ERROR, OUTPUT_LIMIT_EXCEEDED
+
+# The sandboxed judge needs fork (warm workers), wait4 (rusage) and selectable pipes; elsewhere
+# each test runs under a plain wall-clock timeout
+SANDBOX_SUPPORTED = hasattr(os, "fork") and hasattr(os, "wait4") and resource is not None
 
 
 class CodeExecutor:
     TIMEOUT = 5
+    RSS_SAMPLE_INTERVAL = 0.01
+
+    # Shared across submissions so concurrent judges never run more than JUDGE_MAX_WORKERS tests at once
+    _pool = None
+    _worker_pool = None
+    _pool_lock = threading.Lock()
+
+    @classmethod
+    def get_pool(cls) -> ThreadPoolExecutor:
+        if cls._pool is None:
+            with cls._pool_lock:
+                if cls._pool is None:
+                    cls._pool = ThreadPoolExecutor(max_workers=JUDGE_MAX_WORKERS, thread_name_prefix="judge")
+        return cls._pool
+
+    @classmethod
+    def get_worker_pool(cls) -> WarmWorkerPool:
+        if cls._worker_pool is None:
+            with cls._pool_lock:
+                if cls._worker_pool is None:
+                    cls._worker_pool = WarmWorkerPool(
+                        size=JUDGE_MAX_WORKERS,
+                        max_runs=WORKER_MAX_RUNS,
+                        limits=cls.resource_limits()
+                    )
+        return cls._worker_pool
+
+    @classmethod
+    def shutdown(cls):
+        if cls._worker_pool is not None:
+            cls._worker_pool.shutdown()
+            cls._worker_pool = None
 
     @staticmethod
-    def execute_code(code: str, test_input: str) -> tuple:
+    def resource_limits() -> dict:
+        """rlimits applied to each judged program, as {resource name: limit}."""
+        return {
+            "RLIMIT_CPU": JUDGE_CPU_SECONDS,
+            "RLIMIT_AS": JUDGE_MEMORY_LIMIT_MB * 1024 * 1024,
+            "RLIMIT_NOFILE": JUDGE_MAX_OPEN_FILES,
+            "RLIMIT_NPROC": JUDGE_MAX_PROCESSES,
+            "RLIMIT_FSIZE": JUDGE_MAX_OUTPUT_KB * 1024,  # bounds the warm workers' output files too
+        }
+
+    @staticmethod
+    def execute_code(code: str, test_input: str, cancel: threading.Event = None, mode: str = None) -> tuple:
+        """Run code on one input. Returns (success, stdout, stderr, metrics).
+
+        On failure stderr holds the error, or "Time Limit Exceeded" / "Memory Limit Exceeded" /
+        "Output Limit Exceeded" / "Cancelled". metrics has wall_time_ms, cpu_time_ms and max_rss_kb.
+        """
+        if not SANDBOX_SUPPORTED:
+            return CodeExecutor._execute_plain(code, test_input)
+        if (mode or EXECUTOR_MODE) == "warm":
+            return CodeExecutor.get_worker_pool().run(code, test_input, CodeExecutor.TIMEOUT, cancel)
+        return CodeExecutor._execute_spawn(code, test_input, cancel)
+
+    @staticmethod
+    def _execute_plain(code: str, test_input: str) -> tuple:
+        """Run the code with only a wall-clock timeout, for platforms without the sandbox."""
+        start = time.monotonic()
         try:
             result = subprocess.run(
                 ['python', '-c', code],
@@ -14,39 +92,288 @@ class CodeExecutor:
                 text=True,
                 timeout=CodeExecutor.TIMEOUT
             )
+        except subprocess.TimeoutExpired:
+            return (False, "", "Time Limit Exceeded", {"wall_time_ms": round(CodeExecutor.TIMEOUT * 1000, 1)})
+        except Exception as e:
+            return (False, "", f"{JUDGE_ERROR}: {e}", {})
 
-            if result.returncode != 0:
-                return (False, result.stdout, result.stderr)
+        metrics = {"wall_time_ms": round((time.monotonic() - start) * 1000, 1)}
+        if len(result.stdout) + len(result.stderr) > JUDGE_MAX_OUTPUT_KB * 1024:
+            return (False, "", OUTPUT_LIMIT_EXCEEDED, metrics)
+        if result.returncode != 0:
+            return (False, result.stdout, result.stderr, metrics)
+        return (True, result.stdout, "", metrics)
 
-            return (True, result.stdout, "")
+    @staticmethod
+    def _apply_limits(pid: int):
+        # prlimit on the child instead of preexec_fn, which isn't safe in a threaded server
+        if resource is None or not hasattr(resource, "prlimit"):
+            return
+        for name, limit in CodeExecutor.resource_limits().items():
+            # Hard CPU limit one second later so the soft limit delivers SIGXCPU rather than SIGKILL
+            hard = limit + 1 if name == "RLIMIT_CPU" else limit
+            try:
+                resource.prlimit(pid, getattr(resource, name), (limit, hard))
+            except (OSError, ValueError):
+                pass
 
-        except subprocess.TimeoutExpired:
-            return (False, "", "Time Limit Exceeded")
+    @staticmethod
+    def _execute_spawn(code: str, test_input: str, cancel: threading.Event = None) -> tuple:
+        """Run the code in a brand-new interpreter."""
+        start = time.monotonic()
+        try:
+            proc = subprocess.Popen(
+                ['python', '-c', code],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
         except Exception as e:
-            return (False, "", str(e))
+            return (False, "", f"{JUDGE_ERROR}: {e}", {})
+
+        CodeExecutor._apply_limits(proc.pid)
+
+        deadline = start + CodeExecutor.TIMEOUT
+        peak = {"rss_kb": CodeExecutor._peak_rss_kb(proc.pid)}
+        stdout, stderr, interrupted = CodeExecutor._communicate(proc, test_input.encode(), deadline, cancel, peak)
+        status, usage, reaped_interrupt = CodeExecutor._reap(proc, deadline, cancel, peak)
+        interrupted = interrupted or reaped_interrupt
+
+        metrics = {
+            "wall_time_ms": round((time.monotonic() - start) * 1000, 1),
+            "cpu_time_ms": round((usage.ru_utime + usage.ru_stime) * 1000, 1),
+            "max_rss_kb": peak["rss_kb"],
+        }
+        stdout = stdout.decode(errors="replace")
+        stderr = stderr.decode(errors="replace")
+
+        if interrupted:
+            return (False, "", interrupted, metrics)
+        if proc.returncode == -signal.SIGXCPU:
+            return (False, "", "Time Limit Exceeded", metrics)
+        if proc.returncode != 0:
+            if CodeExecutor._is_memory_error(stderr, proc.returncode, metrics["max_rss_kb"]):
+                return (False, stdout, "Memory Limit Exceeded", metrics)
+            return (False, stdout, stderr, metrics)
+
+        return (True, stdout, "", metrics)
+
+    @staticmethod
+    def _peak_rss_kb(pid: int, previous: int = None):
+        """Peak RSS (VmHWM) of a running child, keeping `previous` once it has exited.
+
+        wait4's ru_maxrss can't be used: Linux carries the server's own peak across exec.
+        """
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return max(int(line.split()[1]), previous or 0)
+        except OSError:
+            pass
+        return previous
 
     @staticmethod
-    def classify_failure(code: str, test_outputs: list) -> tuple:
+    def _communicate(proc, stdin_data: bytes, deadline: float, cancel: threading.Event = None,
+                     peak: dict = None) -> tuple:
+        """Feed stdin and drain stdout/stderr until EOF, the deadline, or cancellation.
+
+        Returns (stdout, stderr, interrupted) where interrupted is None, "Time Limit Exceeded",
+        "Output Limit Exceeded" or "Cancelled". The process is killed when interrupted. Peak RSS
+        is sampled into `peak["rss_kb"]` every RSS_SAMPLE_INTERVAL while waiting.
+        """
+        outputs = {proc.stdout.fileno(): [], proc.stderr.fileno(): []}
+        output_budget = JUDGE_MAX_OUTPUT_KB * 1024
+        with selectors.DefaultSelector() as selector:
+            for fd in outputs:
+                selector.register(fd, selectors.EVENT_READ)
+            if stdin_data:
+                selector.register(proc.stdin.fileno(), selectors.EVENT_WRITE)
+            else:
+                proc.stdin.close()
+
+            view, offset = memoryview(stdin_data), 0
+            while selector.get_map():
+                remaining = deadline - time.monotonic()
+                interrupted = None
+                if remaining <= 0:
+                    interrupted = "Time Limit Exceeded"
+                elif cancel is not None and cancel.is_set():
+                    interrupted = "Cancelled"
+                if interrupted:
+                    proc.kill()
+                    return (b"".join(outputs[proc.stdout.fileno()]), b"".join(outputs[proc.stderr.fileno()]), interrupted)
+
+                # Wake up periodically to sample memory and to notice cancellation by a failed sibling test
+                timeout = min(remaining, CodeExecutor.RSS_SAMPLE_INTERVAL)
+                events = selector.select(timeout)
+                if peak is not None:
+                    peak["rss_kb"] = CodeExecutor._peak_rss_kb(proc.pid, peak["rss_kb"])
+                for key, _ in events:
+                    if key.fd in outputs:
+                        data = os.read(key.fd, 32768)
+                        if not data:
+                            selector.unregister(key.fd)
+                            continue
+                        output_budget -= len(data)
+                        if output_budget < 0:
+                            # Stop buffering here: the output lives in this (the API) process
+                            proc.kill()
+                            return (b"", b"", OUTPUT_LIMIT_EXCEEDED)
+                        outputs[key.fd].append(data)
+                        continue
+
+                    try:
+                        offset += os.write(key.fd, view[offset:offset + select.PIPE_BUF])
+                    except BrokenPipeError:
+                        offset = len(view)
+                    if offset >= len(view):
+                        selector.unregister(key.fd)
+                        proc.stdin.close()
+
+        return (b"".join(outputs[proc.stdout.fileno()]), b"".join(outputs[proc.stderr.fileno()]), None)
+
+    @staticmethod
+    def _reap(proc, deadline: float, cancel: threading.Event = None, peak: dict = None) -> tuple:
+        """Wait for the child with wait4 to collect its rusage. Returns (status, rusage, interrupted)."""
+        interrupted = None
+        while True:
+            if peak is not None:
+                peak["rss_kb"] = CodeExecutor._peak_rss_kb(proc.pid, peak["rss_kb"])
+            pid, status, usage = os.wait4(proc.pid, os.WNOHANG)
+            if pid:
+                break
+            if interrupted is None and time.monotonic() >= deadline:
+                interrupted = "Time Limit Exceeded"
+                proc.kill()
+            elif interrupted is None and cancel is not None and cancel.is_set():
+                interrupted = "Cancelled"
+                proc.kill()
+            time.sleep(0.002)
+
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        for stream in (proc.stdin, proc.stdout, proc.stderr):
+            if not stream.closed:
+                stream.close()
+        return (status, usage, interrupted)
+
+    @staticmethod
+    def _is_memory_error(stderr: str, returncode: int, max_rss_kb: int) -> bool:
+        if "MemoryError" in stderr.strip().split("\n")[-1]:
+            return True
+        # Allocations past RLIMIT_AS can also surface as a crash signal instead of MemoryError
+        return returncode < 0 and (max_rss_kb or 0) * 1024 >= 0.9 * JUDGE_MEMORY_LIMIT_MB * 1024 * 1024
+
+    @staticmethod
+    def classify_failure(code: str, test_outputs: list, parallel: bool = None, on_test=None) -> tuple:
+        """Judge the code against (input, expected) pairs and return (status, analysis)."""
+        status, analysis, _ = CodeExecutor.judge(code, test_outputs, parallel, on_test)
+        return (status, analysis)
+
+    @staticmethod
+    def judge(code: str, test_outputs: list, parallel: bool = None, on_test=None) -> tuple:
+        """Judge the code and return (status, analysis, test_results).
+
+        test_results holds one dict per test: index, status ("passed", a failure status, or
+        "cancelled" for tests stopped after an earlier failure), wall_time_ms, cpu_time_ms and
+        max_rss_kb. `on_test(test_result)` is called as each test finishes.
+        """
         syntax_error = CodeExecutor._check_syntax(code)
         if syntax_error:
-            return ("syntax", f"Syntax error: {syntax_error}")
+            return ("syntax", f"Syntax error: {syntax_error}", [])
 
-        for test_input, expected_output in test_outputs:
-            success, actual_output, error = CodeExecutor.execute_code(code, test_input)
+        if parallel is None:
+            parallel = JUDGE_PARALLEL
+
+        results = {}
+
+        def record(index: int, status: str, metrics: dict):
+            result = {
+                "index": index,
+                "status": status,
+                "wall_time_ms": metrics.get("wall_time_ms"),
+                "cpu_time_ms": metrics.get("cpu_time_ms"),
+                "max_rss_kb": metrics.get("max_rss_kb"),
+            }
+            results[index] = result
+            if on_test:
+                on_test(result)
+
+        if parallel and len(test_outputs) > 1:
+            failure = CodeExecutor._run_tests_parallel(code, test_outputs, record)
+        else:
+            failure = CodeExecutor._run_tests_sequential(code, test_outputs, record)
+
+        status, analysis = failure or ("accepted", "All tests passed")
+        return (status, analysis, [results[i] for i in sorted(results)])
+
+    @staticmethod
+    def _run_tests_sequential(code: str, test_outputs: list, record):
+        for i, (test_input, expected_output) in enumerate(test_outputs):
+            failure, metrics = CodeExecutor._judge_test(code, test_input, expected_output)
+            record(i, failure[0] if failure else "passed", metrics)
+            if failure:
+                for j in range(i + 1, len(test_outputs)):
+                    record(j, "cancelled", {})
+                return failure
+        return None
+
+    @staticmethod
+    def _run_tests_parallel(code: str, test_outputs: list, record):
+        """Run tests concurrently and report the same failure the sequential judge would.
+
+        When test i fails every test after it is cancelled (or killed if already running);
+        tests before it keep running because one of them may be the first failure.
+        """
+        pool = CodeExecutor.get_pool()
+        cancels = [threading.Event() for _ in test_outputs]
+        futures = {
+            pool.submit(CodeExecutor._judge_test, code, test_input, expected_output, cancels[i]): i
+            for i, (test_input, expected_output) in enumerate(test_outputs)
+        }
+
+        first_index, first_failure = len(test_outputs), None
+        for future in as_completed(futures):
+            i = futures[future]
+            if future.cancelled():
+                record(i, "cancelled", {})
+                continue
+
+            failure, metrics = future.result()
+            record(i, failure[0] if failure else "passed", metrics)
+            if failure and failure[0] != "cancelled" and i < first_index:
+                first_index, first_failure = i, failure
+                for j, other in enumerate(futures):
+                    if j > i:
+                        cancels[j].set()
+                        other.cancel()
+
+        return first_failure
+
+    @staticmethod
+    def _judge_test(code: str, test_input: str, expected_output: str, cancel: threading.Event = None) -> tuple:
+        """Return (failure, metrics); failure is (status, analysis), or None if the test passes."""
+        success, actual_output, error, metrics = CodeExecutor.execute_code(code, test_input, cancel)
 
-            if not success:
-                if "Time Limit Exceeded" in error:
-                    return ("tle", "Code runs too slowly (timeout after 5s)")
-                return ("runtime", f"Runtime error: {error}")
+        if not success:
+            if error == "Cancelled":
+                return (("cancelled", ""), metrics)
+            if "Time Limit Exceeded" in error:
+                return (("tle", "Code runs too slowly (timeout after 5s)"), metrics)
+            if "Memory Limit Exceeded" in error:
+                return (("mle", f"Memory limit exceeded ({JUDGE_MEMORY_LIMIT_MB} MB)"), metrics)
+            if error == OUTPUT_LIMIT_EXCEEDED:
+                return (("wrong_answer", f"Output limit exceeded ({JUDGE_MAX_OUTPUT_KB} KB)"), metrics)
+            return (("runtime", f"Runtime error: {error}"), metrics)
 
-            actual_clean = actual_output.strip()
-            expected_clean = expected_output.strip()
+        actual_clean = actual_output.strip()
+        expected_clean = expected_output.strip()
 
-            if actual_clean != expected_clean:
-                diff = CodeExecutor._get_diff_summary(actual_clean, expected_clean)
-                return ("wrong_answer", diff)
+        if actual_clean != expected_clean:
+            diff = CodeExecutor._get_diff_summary(actual_clean, expected_clean)
+            return (("wrong_answer", diff), metrics)
 
-        return ("accepted", "All tests passed")
+        return (None, metrics)
 
     @staticmethod
     def _check_syntax(code: str) -> str:
@@ -68,4 +395,4 @@ class CodeExecutor:
             if a != e:
                 return f"Line {i + 1}: got '{a[:40]}' but expected '{e[:40]}'"
 
-        return "Output mismatch (format issue)"
\ No newline at end of file
+        return "Output mismatch (format issue)"
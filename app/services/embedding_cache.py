@@ -0,0 +1,76 @@
+import hashlib
+from datetime import datetime
+
+from app.database import SessionLocal
+from app.models import EmbeddingCacheEntry
+from app.services.embedding_codec import EmbeddingCodec
+from app.services.lru_cache import LRUCache
+
+
+class EmbeddingCache:
+    """Memoized text embeddings keyed by sha256(model name + text).
+
+    Vectors live in an in-memory LRU, optionally backed by the embedding_cache table so a
+    restart doesn't lose them. Cached vectors are read-only since they are shared between callers.
+    """
+
+    def __init__(self, model_name: str, max_size: int = 4096, persist: bool = False):
+        self.model_name = model_name
+        self.persist = persist
+        self._memory = LRUCache(max_size)
+        self.db_hits = 0
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode()).hexdigest()
+
+    def get_many(self, keys: list) -> dict:
+        """Return {key: vector} for the keys that are cached."""
+        found = {}
+        for key in keys:
+            emb = self._memory.get(key)
+            if emb is not None:
+                found[key] = emb
+
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if not missing or not self.persist:
+            return found
+
+        db = SessionLocal()
+        try:
+            rows = db.query(EmbeddingCacheEntry.key, EmbeddingCacheEntry.embedding).filter(
+                EmbeddingCacheEntry.key.in_(missing)
+            ).all()
+        except Exception as e:
+            print(f"Warning: Could not read cached embeddings: {e}")
+            rows = []
+        finally:
+            db.close()
+
+        for key, blob in rows:
+            emb = EmbeddingCodec.decode(blob)
+            self._memory.put(key, emb)
+            found[key] = emb
+        self.db_hits += len(rows)
+        return found
+
+    def put_many(self, embeddings: dict):
+        for key, emb in embeddings.items():
+            emb.setflags(write=False)
+            self._memory.put(key, emb)
+        if not self.persist or not embeddings:
+            return
+
+        created_at = datetime.now().isoformat()
+        db = SessionLocal()
+        try:
+            for key, emb in embeddings.items():
+                db.merge(EmbeddingCacheEntry(key=key, embedding=EmbeddingCodec.encode(emb), created_at=created_at))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Warning: Could not persist embeddings: {e}")
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        return {**self._memory.stats(), "persistent": self.persist, "db_hits": self.db_hits}
@@ -0,0 +1,76 @@
+import pickle
+import struct
+
+import numpy as np
+
+
+class EmbeddingCodec:
+    """Compact binary encoding for embedding blobs.
+
+    Layout: a 12-byte little-endian header (magic, format version, dtype code, dimension,
+    int8 scale) followed by the raw little-endian vector. float32 blobs decode zero-copy
+    with `np.frombuffer`. float16 and int8 halve or quarter the size and are widened to
+    float32 on decode. Legacy pickle blobs are still read, so existing databases keep
+    working until `cli migrate-embeddings` rewrites them.
+    """
+
+    MAGIC = b"KBEM"
+    VERSION = 1
+    HEADER = struct.Struct("<4sBBHf")
+    DTYPES = {
+        "float32": (0, np.dtype("<f4")),
+        "float16": (1, np.dtype("<f2")),
+        "int8": (2, np.dtype("i1")),
+    }
+    _BY_CODE = {code: (name, dtype) for name, (code, dtype) in DTYPES.items()}
+
+    @classmethod
+    def encode(cls, emb: np.ndarray, dtype: str = "float32") -> bytes:
+        if dtype not in cls.DTYPES:
+            raise ValueError(f"Unsupported embedding dtype: {dtype}")
+        code, np_dtype = cls.DTYPES[dtype]
+        emb = np.asarray(emb, dtype=np.float32).ravel()
+
+        scale = 1.0
+        if dtype == "int8":
+            # Symmetric per-vector quantization: value ≈ int8 * scale
+            max_abs = float(np.abs(emb).max()) if emb.size else 0.0
+            scale = max_abs / 127.0 if max_abs > 0 else 1.0
+            payload = np.clip(np.rint(emb / scale), -127, 127).astype(np_dtype)
+        else:
+            payload = emb.astype(np_dtype)
+
+        return cls.HEADER.pack(cls.MAGIC, cls.VERSION, code, emb.size, scale) + payload.tobytes()
+
+    @classmethod
+    def is_encoded(cls, blob: bytes) -> bool:
+        return bool(blob) and blob[:4] == cls.MAGIC
+
+    @classmethod
+    def dtype_of(cls, blob: bytes):
+        """Storage dtype name of an encoded blob, "pickle" for legacy blobs, or None if empty."""
+        if not blob:
+            return None
+        if not cls.is_encoded(blob):
+            return "pickle"
+        _, _, code, _, _ = cls.HEADER.unpack_from(blob)
+        return cls._BY_CODE[code][0]
+
+    @classmethod
+    def decode(cls, blob: bytes) -> np.ndarray:
+        """Decode to a float32 vector (read-only view of `blob` for float32 storage)."""
+        if not cls.is_encoded(blob):
+            # Legacy format; only ever written by this app
+            return np.asarray(pickle.loads(blob), dtype=np.float32)
+
+        _, version, code, dim, scale = cls.HEADER.unpack_from(blob)
+        if version != cls.VERSION or code not in cls._BY_CODE:
+            raise ValueError(f"Unknown embedding format (version {version}, dtype {code})")
+
+        name, np_dtype = cls._BY_CODE[code]
+        values = np.frombuffer(blob, dtype=np_dtype, count=dim, offset=cls.HEADER.size)
+        if name == "float32":
+            return values
+        if name == "int8":
+            return values.astype(np.float32) * np.float32(scale)
+        return values.astype(np.float32)
@@ -1,43 +1,161 @@
+import hashlib
+import threading
+
 import numpy as np
-from sentence_transformers import SentenceTransformer
+
+from app.config import EMBEDDING_CACHE_PERSIST, EMBEDDING_CACHE_SIZE, EMBEDDING_DTYPE, PROBLEM_INDEX_PATH
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_codec import EmbeddingCodec
+from app.services.vector_index import ProblemVectorIndex
 
 
 class EmbeddingService:
+    MODEL_NAME = 'all-MiniLM-L6-v2'
+
     _model = None
+    _model_lock = threading.Lock()
+    _index = None
+    _index_lock = threading.Lock()
+    _cache = EmbeddingCache(MODEL_NAME, max_size=EMBEDDING_CACHE_SIZE, persist=EMBEDDING_CACHE_PERSIST)
 
     @classmethod
     def get_model(cls):
         if cls._model is None:
-            cls._model = SentenceTransformer('all-MiniLM-L6-v2')
+            with cls._model_lock:
+                if cls._model is None:
+                    # Imported on first use: torch + transformers cost seconds of startup
+                    from sentence_transformers import SentenceTransformer
+                    cls._model = SentenceTransformer(cls.MODEL_NAME)
         return cls._model
 
     @staticmethod
     def embed_text(text: str) -> np.ndarray:
-        model = EmbeddingService.get_model()
-        return model.encode(text, convert_to_numpy=True)
+        return EmbeddingService.embed_texts([text])[0]
+
+    @staticmethod
+    def embed_texts(texts: list, batch_size: int = 64, use_cache: bool = True) -> np.ndarray:
+        """Encode many texts in batches; returns an (n, dim) array. Only cache misses hit the model."""
+        if not use_cache:
+            return EmbeddingService.get_model().encode(texts, batch_size=batch_size, convert_to_numpy=True)
+
+        cache = EmbeddingService._cache
+        keys = [cache.key(text) for text in texts]
+        found = cache.get_many(keys)
+
+        misses = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                misses.setdefault(key, text)
+        if misses:
+            # The model is only loaded when something actually needs encoding
+            encoded = EmbeddingService.get_model().encode(list(misses.values()), batch_size=batch_size,
+                                                          convert_to_numpy=True)
+            computed = dict(zip(misses, encoded))
+            cache.put_many(computed)
+            found.update(computed)
+
+        return np.stack([found[key] for key in keys])
+
+    @staticmethod
+    def cache_stats() -> dict:
+        return EmbeddingService._cache.stats()
+
+    @staticmethod
+    def problem_text(title: str, tags: str, description: str) -> str:
+        return f"{title} {tags} {description or ''}"
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode()).hexdigest()
 
     @staticmethod
     def cosine_similarity(emb1: np.ndarray, emb2: np.ndarray) -> float:
         return np.dot(emb1, emb2) / (np.linalg.norm(emb1) * np.linalg.norm(emb2))
 
+    @classmethod
+    def get_index(cls) -> ProblemVectorIndex:
+        """Problem embedding index: memory-mapped from disk, or built from the DB blobs once.
+
+        Reloaded when the files change, e.g. after `cli embed-problems` ran in another process.
+        """
+        if cls._index is None:
+            with cls._index_lock:
+                if cls._index is None:
+                    cls._index = ProblemVectorIndex.load(PROBLEM_INDEX_PATH) or cls.build_index()
+        else:
+            cls._reload_if_changed()
+        return cls._index
+
+    @classmethod
+    def _reload_if_changed(cls):
+        index = cls._index
+        signature = ProblemVectorIndex.file_signature(PROBLEM_INDEX_PATH)
+        if signature is None or signature == index.signature:
+            return
+        with cls._index_lock:
+            if cls._index is not index:
+                return
+            reloaded = ProblemVectorIndex.load(PROBLEM_INDEX_PATH)
+            if reloaded is not None:  # None while the writer is between its two renames; retried next call
+                cls._index = reloaded
+
+    @classmethod
+    def build_index(cls, save: bool = True) -> ProblemVectorIndex:
+        from app.database import SessionLocal
+        from app.models import Problem
+
+        index = ProblemVectorIndex()
+        db = SessionLocal()
+        try:
+            rows = db.query(Problem.id, Problem.embedding).filter(Problem.embedding.isnot(None)).all()
+        finally:
+            db.close()
+
+        ids, embeddings = [], []
+        for problem_id, blob in rows:
+            if not blob:
+                continue
+            try:
+                embeddings.append(cls.deserialize_embedding(blob))
+                ids.append(problem_id)
+            except Exception as e:
+                print(f"Warning: Could not load embedding for problem {problem_id}: {e}")
+
+        if ids:
+            index.upsert_many(ids, np.stack(embeddings))
+            if save:
+                index.save(PROBLEM_INDEX_PATH)
+        return index
+
+    @classmethod
+    def search_similar(cls, query_embedding: np.ndarray, k: int = 10, exclude_ids=()) -> list:
+        """Top-k [(problem_id, similarity)] over all indexed problems."""
+        return cls.get_index().search(query_embedding, k, exclude_ids)
+
     @staticmethod
     def find_similar_problems(query_embedding: np.ndarray, candidate_problems) -> list:
+        candidate_problems = list(candidate_problems)
+        index = EmbeddingService.get_index()
+        sims = index.scores_for(query_embedding, [p.id for p in candidate_problems])
+
         scores = []
-        for problem in candidate_problems:
-            problem_emb = EmbeddingService.deserialize_embedding(problem.embedding)
-            sim = EmbeddingService.cosine_similarity(query_embedding, problem_emb)
-            scores.append((problem, sim))
+        for problem, sim in zip(candidate_problems, sims):
+            if np.isnan(sim):
+                # Not indexed yet (embedded outside `cli embed-problems`)
+                if not problem.embedding:
+                    continue
+                problem_emb = EmbeddingService.deserialize_embedding(problem.embedding)
+                sim = EmbeddingService.cosine_similarity(query_embedding, problem_emb)
+            scores.append((problem, float(sim)))
 
         scores.sort(key=lambda x: x[1], reverse=True)
         return scores
 
     @staticmethod
-    def serialize_embedding(emb: np.ndarray) -> bytes:
-        import pickle
-        return pickle.dumps(emb)
+    def serialize_embedding(emb: np.ndarray, dtype: str = None) -> bytes:
+        return EmbeddingCodec.encode(emb, dtype or EMBEDDING_DTYPE)
 
     @staticmethod
     def deserialize_embedding(emb_bytes: bytes) -> np.ndarray:
-        import pickle
-        return pickle.loads(emb_bytes)
+        return EmbeddingCodec.decode(emb_bytes)
 
@@ -0,0 +1,126 @@
+from datetime import datetime
+
+import numpy as np
+
+from app.database import upsert_insert
+from app.models import Problem, Submission, UserTagStats
+
+ALL_TAGS = ['array', 'dp', 'graph', 'greedy', 'string', 'math']
+DIFFICULTY_MAP = {'easy': 0, 'medium': 1, 'hard': 2}
+
+
+def parse_tags(tags: str) -> list:
+    return [t.strip() for t in (tags or '').split(',')]
+
+
+class UserFeatureStore:
+    """Per-user, per-tag submission statistics kept as one fixed-width float64 blob per user.
+
+    The blob is a (3, len(ALL_TAGS)) array: attempts, accepted submissions and total
+    seconds spent on accepted submissions, per tag. Each submission updates one row
+    in O(1), and `load_many` fetches the arrays for any number of users in one query.
+    """
+
+    ATTEMPTS, SOLVED, SOLVE_SECONDS = range(3)
+    SHAPE = (3, len(ALL_TAGS))
+    PRIOR_WEIGHT = 2.0  # success rates shrink toward 0.5 until a tag has a few attempts
+
+    @classmethod
+    def empty(cls) -> np.ndarray:
+        return np.zeros(cls.SHAPE, dtype=np.float64)
+
+    @classmethod
+    def decode(cls, blob: bytes) -> np.ndarray:
+        if not blob:
+            return cls.empty()
+        return np.frombuffer(blob, dtype='<f8').reshape(cls.SHAPE)
+
+    @staticmethod
+    def encode(stats: np.ndarray) -> bytes:
+        return np.ascontiguousarray(stats, dtype='<f8').tobytes()
+
+    @staticmethod
+    def tag_mask(tags: str) -> np.ndarray:
+        tags_list = parse_tags(tags)
+        return np.array([tag in tags_list for tag in ALL_TAGS])
+
+    @classmethod
+    def record_submission(cls, db, user_id: int, tags: str, accepted: bool, time_spent_seconds: int,
+                          commit: bool = True):
+        """Add one submission to the user's stats and commit the session (with commit=False the caller commits).
+
+        Concurrent submissions for the same user, from any thread, process or node, apply one after the other: the
+        insert-or-ignore creates the row and (on SQLite) takes the database write lock before the read, and
+        SELECT ... FOR UPDATE holds the row lock on PostgreSQL until the transaction ends.
+        """
+        mask = cls.tag_mask(tags)
+        now = datetime.now().isoformat()
+
+        db.execute(
+            upsert_insert(UserTagStats)
+            .values(user_id=user_id, stats=cls.encode(cls.empty()), updated_at=now)
+            .on_conflict_do_nothing(index_elements=["user_id"])
+        )
+        blob = db.query(UserTagStats.stats).filter(UserTagStats.user_id == user_id).with_for_update().scalar()
+        stats = cls.decode(blob).copy()
+
+        stats[cls.ATTEMPTS, mask] += 1
+        if accepted:
+            stats[cls.SOLVED, mask] += 1
+            stats[cls.SOLVE_SECONDS, mask] += max(time_spent_seconds or 0, 0)
+
+        db.query(UserTagStats).filter(UserTagStats.user_id == user_id).update(
+            {"stats": cls.encode(stats), "updated_at": now}, synchronize_session=False
+        )
+        if commit:
+            db.commit()
+
+    @classmethod
+    def load(cls, db, user_id: int) -> np.ndarray:
+        return cls.load_many(db, [user_id])[user_id]
+
+    @classmethod
+    def load_many(cls, db, user_ids: list) -> dict:
+        """{user_id: stats array} for every requested user (empty stats if none recorded)."""
+        rows = db.query(UserTagStats.user_id, UserTagStats.stats).filter(UserTagStats.user_id.in_(user_ids)).all()
+        found = {user_id: cls.decode(blob) for user_id, blob in rows}
+        return {user_id: found.get(user_id, cls.empty()) for user_id in user_ids}
+
+    @classmethod
+    def success_rates(cls, stats: np.ndarray) -> np.ndarray:
+        """Smoothed success rate per tag (0.5 for tags never attempted). Works on (..., 3, n_tags)."""
+        prior = cls.PRIOR_WEIGHT
+        return (stats[..., cls.SOLVED, :] + 0.5 * prior) / (stats[..., cls.ATTEMPTS, :] + prior)
+
+    @classmethod
+    def avg_solve_seconds(cls, stats: np.ndarray) -> np.ndarray:
+        """Mean seconds per accepted submission, per tag (0 where none)."""
+        solved = stats[..., cls.SOLVED, :]
+        return np.divide(stats[..., cls.SOLVE_SECONDS, :], solved, out=np.zeros_like(solved), where=solved > 0)
+
+    @classmethod
+    def rebuild(cls, db) -> int:
+        """Recompute every user's stats from submission history (one-off backfill)."""
+        problem_masks = {pid: cls.tag_mask(tags) for pid, tags in db.query(Problem.id, Problem.tags).all()}
+        all_stats = {}
+        rows = db.query(
+            Submission.user_id, Submission.problem_id, Submission.status, Submission.time_spent_seconds
+        ).yield_per(5000)
+        for user_id, problem_id, status, time_spent in rows:
+            mask = problem_masks.get(problem_id)
+            if mask is None:
+                continue
+            stats = all_stats.setdefault(user_id, cls.empty())
+            stats[cls.ATTEMPTS, mask] += 1
+            if status == "accepted":
+                stats[cls.SOLVED, mask] += 1
+                stats[cls.SOLVE_SECONDS, mask] += max(time_spent or 0, 0)
+
+        now = datetime.now().isoformat()
+        db.query(UserTagStats).delete()
+        db.bulk_insert_mappings(UserTagStats, [
+            {"user_id": user_id, "stats": cls.encode(stats), "updated_at": now}
+            for user_id, stats in all_stats.items()
+        ])
+        db.commit()
+        return len(all_stats)
@@ -0,0 +1,90 @@
+import hashlib
+import threading
+from datetime import datetime
+
+from app.database import upsert_insert
+from app.models import HintLibraryEntry
+from app.services.mentor_service import MentorService
+from app.services.solution_analyzer import SolutionAnalyzer
+
+
+class HintLibrary:
+    """Hints pre-generated offline (`cli generate-hints`) for every problem x failure class.
+
+    A failed submission is mapped to its failure class and served the stored hint with one
+    primary-key lookup. Each row records a hash of the prompt inputs it was generated from
+    (model, problem title and tags, failure class), so hints for edited problems are treated
+    as missing until the job runs again.
+    """
+
+    _lock = threading.Lock()
+    _counts = {"served": 0, "missing": 0, "stale": 0}
+
+    @staticmethod
+    def inputs_hash(problem_title: str, problem_tags: str, failure_class: str) -> str:
+        failure_type, analysis = SolutionAnalyzer.FAILURE_CLASSES[failure_class]
+        parts = (MentorService.MODEL, problem_title, problem_tags, failure_type, analysis)
+        return hashlib.sha256("\0".join(str(p) for p in parts).encode()).hexdigest()
+
+    @classmethod
+    def _count(cls, name: str):
+        with cls._lock:
+            cls._counts[name] += 1
+
+    @classmethod
+    def lookup(cls, db, problem, failure_type: str, analysis: str):
+        """The stored hint for this failure, or None when there is none (or it is stale)."""
+        failure_class = SolutionAnalyzer.failure_class(failure_type, analysis)
+        if failure_class is None:
+            return None
+
+        entry = db.query(HintLibraryEntry.hint, HintLibraryEntry.inputs_hash).filter(
+            HintLibraryEntry.problem_id == problem.id,
+            HintLibraryEntry.failure_class == failure_class
+        ).first()
+        if entry is None:
+            cls._count("missing")
+            return None
+        if entry.inputs_hash != cls.inputs_hash(problem.title, problem.tags, failure_class):
+            cls._count("stale")
+            return None
+        cls._count("served")
+        return entry.hint
+
+    @classmethod
+    def pending(cls, db, problems: list, force: bool = False) -> list:
+        """(problem, failure_class, inputs_hash) for every pair without an up-to-date hint."""
+        stored = {}
+        if not force:
+            stored = {(pid, fc): h for pid, fc, h in db.query(
+                HintLibraryEntry.problem_id, HintLibraryEntry.failure_class, HintLibraryEntry.inputs_hash
+            ).all()}
+
+        todo = []
+        for problem in problems:
+            for failure_class in SolutionAnalyzer.FAILURE_CLASSES:
+                inputs_hash = cls.inputs_hash(problem.title, problem.tags, failure_class)
+                if stored.get((problem.id, failure_class)) != inputs_hash:
+                    todo.append((problem, failure_class, inputs_hash))
+        return todo
+
+    @staticmethod
+    def store(db, rows: list):
+        """Upsert [{problem_id, failure_class, hint, inputs_hash}] and commit."""
+        if not rows:
+            return
+        now = datetime.now().isoformat()
+        stmt = upsert_insert(HintLibraryEntry)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["problem_id", "failure_class"],
+            set_={name: stmt.excluded[name] for name in ("hint", "inputs_hash", "created_at")},
+        )
+        db.execute(stmt, [{**row, "created_at": now} for row in rows])
+        db.commit()
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._lock:
+            counts = dict(cls._counts)
+        lookups = sum(counts.values())
+        return {**counts, "hit_rate": round(counts["served"] / lookups, 3) if lookups else None}
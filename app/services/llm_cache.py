@@ -0,0 +1,116 @@
+import hashlib
+import random
+import re
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.database import SessionLocal
+from app.models import LLMResponseCacheEntry
+
+
+class LLMResponseCache:
+    """Generated texts (hints, explanations) keyed by their normalized prompt inputs.
+
+    Rows live in the llm_response_cache table, so every worker process shares them. A key
+    collects up to `variants` texts; until it has that many, lookups miss and the
+    caller generates (and `put`s) another one, after which a random variant is served. Rows
+    expire after `ttl_seconds`, and each kind is trimmed to `max_entries` rows, oldest first.
+    """
+
+    def __init__(self, kind: str, ttl_seconds: int = 7 * 24 * 3600, max_entries: int = 10000,
+                 variants: int = 3, enabled: bool = True):
+        self.kind = kind
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.variants = max(variants, 1)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0, "fills": 0, "evicted": 0}
+
+    @staticmethod
+    def normalize(value) -> str:
+        """Case- and whitespace-insensitive form of one prompt input."""
+        return re.sub(r"\s+", " ", str(value)).strip().lower()
+
+    @classmethod
+    def normalize_list(cls, value: str) -> str:
+        """Comma-separated inputs (tags, titles) in a canonical order."""
+        return ",".join(sorted(cls.normalize(v) for v in (value or "").split(",") if v.strip()))
+
+    def make_key(self, *parts) -> str:
+        digest = hashlib.sha256(self.kind.encode())
+        for part in parts:
+            digest.update(b"\0")
+            digest.update(self.normalize(part).encode())
+        return digest.hexdigest()
+
+    def _cutoff(self) -> str:
+        return (datetime.now() - timedelta(seconds=self.ttl_seconds)).isoformat()
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self._counts[name] += n
+
+    def get(self, key: str):
+        """A random cached variant, or None while the key has fewer than `variants` fresh texts."""
+        if not self.enabled:
+            return None
+
+        db = SessionLocal()
+        try:
+            texts = [text for (text,) in db.query(LLMResponseCacheEntry.text).filter(
+                LLMResponseCacheEntry.key == key,
+                LLMResponseCacheEntry.created_at >= self._cutoff()
+            ).all()]
+        except Exception as e:
+            print(f"Warning: Could not read LLM cache: {e}")
+            texts = []
+        finally:
+            db.close()
+
+        if len(texts) < self.variants:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return random.choice(texts)
+
+    def put(self, key: str, text: str):
+        if not self.enabled or not text:
+            return
+
+        Entry = LLMResponseCacheEntry
+        db = SessionLocal()
+        try:
+            # Repeated texts are kept too: a model that keeps giving the same answer still fills the key
+            db.add(Entry(key=key, kind=self.kind, text=text, created_at=datetime.now().isoformat()))
+            db.flush()
+
+            evicted = db.query(Entry).filter(
+                Entry.kind == self.kind, Entry.created_at < self._cutoff()
+            ).delete(synchronize_session=False)
+            excess = db.query(Entry.id).filter(Entry.kind == self.kind).count() - self.max_entries
+            if excess > 0:
+                oldest = select(Entry.id).where(Entry.kind == self.kind).order_by(Entry.created_at).limit(excess)
+                evicted += db.query(Entry).filter(Entry.id.in_(oldest)).delete(synchronize_session=False)
+            db.commit()
+            self._count("fills")
+            self._count("evicted", evicted)
+        except Exception as e:
+            db.rollback()
+            print(f"Warning: Could not persist LLM response: {e}")
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts["hits"] + counts["misses"]
+        return {
+            **counts,
+            "hit_rate": round(counts["hits"] / lookups, 3) if lookups else None,
+            "enabled": self.enabled,
+            "variants": self.variants,
+            "ttl_seconds": self.ttl_seconds,
+        }
@@ -0,0 +1,97 @@
+import asyncio
+import threading
+
+from app.config import OPENAI_API_KEY, LLM_BASE_URL, LLM_MAX_CONCURRENCY, LLM_TIMEOUT_SECONDS
+
+
+class LLMClient:
+    """One process-wide async Anthropic client, driven by a background event loop.
+
+    Sync callers hand coroutines to the loop with `submit` and get a concurrent.futures.Future
+    back, so independent calls (e.g. a hint and a recommendation explanation) run at the same
+    time. Connections are pooled across requests, a semaphore caps in-flight calls for the whole
+    process, and each call (including its wait for a slot) is bounded by a timeout.
+    """
+
+    _lock = threading.Lock()
+    _loop = None
+    _thread = None
+    _client = None      # created on the loop thread, on first use
+    _semaphore = None
+    _stats = {"calls": 0, "errors": 0, "timeouts": 0, "in_flight": 0}
+
+    @classmethod
+    def _get_loop(cls) -> asyncio.AbstractEventLoop:
+        with cls._lock:
+            if cls._loop is None:
+                cls._loop = asyncio.new_event_loop()
+                cls._thread = threading.Thread(target=cls._loop.run_forever, name="llm-client", daemon=True)
+                cls._thread.start()
+            return cls._loop
+
+    @classmethod
+    def _get_client(cls):
+        if cls._client is None:
+            import anthropic
+            # The client keeps one keep-alive connection pool; the semaphore bounds how much of it is used
+            cls._client = anthropic.AsyncAnthropic(api_key=OPENAI_API_KEY, base_url=LLM_BASE_URL,
+                                                   timeout=LLM_TIMEOUT_SECONDS)
+            cls._semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        return cls._client
+
+    @classmethod
+    async def complete(cls, prompt: str, model: str, max_tokens: int, timeout: float = LLM_TIMEOUT_SECONDS) -> str:
+        """Text of a single-turn reply. Raises on API errors and timeouts; callers keep their fallbacks."""
+        client = cls._get_client()
+        stats = cls._stats  # only touched on the loop thread
+
+        async def call():
+            async with cls._semaphore:
+                stats["in_flight"] += 1
+                try:
+                    return await client.messages.create(
+                        model=model,
+                        max_tokens=max_tokens,
+                        messages=[{"role": "user", "content": prompt}]
+                    )
+                finally:
+                    stats["in_flight"] -= 1
+
+        stats["calls"] += 1
+        try:
+            response = await asyncio.wait_for(call(), timeout)
+        except asyncio.TimeoutError:
+            stats["timeouts"] += 1
+            raise
+        except Exception:
+            stats["errors"] += 1
+            raise
+        return response.content[0].text
+
+    @classmethod
+    def submit(cls, coro):
+        """Schedule a coroutine on the client loop; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, cls._get_loop())
+
+    @classmethod
+    def run(cls, coro):
+        """Run a coroutine on the client loop and wait for its result."""
+        return cls.submit(coro).result()
+
+    @classmethod
+    def stats(cls) -> dict:
+        return dict(cls._stats, max_concurrency=LLM_MAX_CONCURRENCY, timeout_seconds=LLM_TIMEOUT_SECONDS)
+
+    @classmethod
+    def shutdown(cls):
+        with cls._lock:
+            loop, cls._loop = cls._loop, None
+        if loop is None:
+            return
+        if cls._client is not None:
+            client, cls._client = cls._client, None
+            try:
+                asyncio.run_coroutine_threadsafe(client.close(), loop).result(timeout=5)
+            except Exception as e:
+                print(f"Warning: Could not close LLM client: {e}")
+        loop.call_soon_threadsafe(loop.stop)
@@ -1,15 +1,55 @@
+import asyncio
 import json
-import anthropic
-from app.config import OPENAI_API_KEY
+from app.config import LLM_CACHE_ENABLED, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_VARIANTS
 from app.services.embedding_service import EmbeddingService
+from app.services.llm_cache import LLMResponseCache
+from app.services.llm_client import LLMClient
+
+
+def _response_cache(kind: str) -> LLMResponseCache:
+    return LLMResponseCache(kind, ttl_seconds=LLM_CACHE_TTL_SECONDS, max_entries=LLM_CACHE_MAX_ENTRIES,
+                            variants=LLM_CACHE_VARIANTS, enabled=LLM_CACHE_ENABLED)
 
 
 class MentorService:
+    """Mentor hints and explanations. LLM calls go through the shared LLMClient; the `*_async`
+    variants can be scheduled with `LLMClient.submit` so several run concurrently.
+
+    Generated texts are cached by their normalized prompt inputs (see LLMResponseCache);
+    fallback texts used when a call fails are never cached.
+    """
+
+    MODEL = "claude-3-5-sonnet-20241022"
+
+    hint_cache = _response_cache("hint")
+    explanation_cache = _response_cache("explanation")
+
     def __init__(self):
-        self.client = anthropic.Anthropic(api_key=OPENAI_API_KEY)
         self.embedding_service = EmbeddingService()
 
     def generate_hint(self, failure_type: str, failure_analysis: str, problem_title: str, problem_tags: str) -> str:
+        return LLMClient.run(self.generate_hint_async(failure_type, failure_analysis, problem_title, problem_tags))
+
+    async def generate_hint_async(self, failure_type: str, failure_analysis: str, problem_title: str,
+                                  problem_tags: str) -> str:
+        cache = self.hint_cache
+        key = cache.make_key(self.MODEL, failure_type, failure_analysis, problem_title,
+                             cache.normalize_list(problem_tags))
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            return cached
+
+        try:
+            hint = await self.request_hint(failure_type, failure_analysis, problem_title, problem_tags)
+        except Exception:
+            return "Review the problem requirements carefully and trace through a simple example step-by-step."
+
+        asyncio.get_running_loop().run_in_executor(None, cache.put, key, hint)  # don't wait for the write
+        return hint
+
+    async def request_hint(self, failure_type: str, failure_analysis: str, problem_title: str,
+                           problem_tags: str) -> str:
+        """One live LLM hint, uncached. Raises on errors and timeouts (used by the offline hint library job)."""
         prompt = f"""You are a competitive programming mentor. A student failed the problem "{problem_title}" (tags: {problem_tags}).
 
 Failure type: {failure_type}
@@ -20,43 +60,25 @@ Generate a SHORT, NON-SPOILER mentor hint (max 2-3 sentences). Do NOT give code
 Respond ONLY with valid JSON:
 {{"hint": "your hint here"}}"""
 
-        try:
-            response = self.client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=200,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            result = json.loads(response.content[0].text)
-            hint = result.get("hint", "")
-            return hint[:300]
-        except Exception:
-            return "Review the problem requirements carefully and trace through a simple example step-by-step."
+        text = await LLMClient.complete(prompt, model=self.MODEL, max_tokens=200)
+        result = json.loads(text)
+        return result.get("hint", "")[:300]
 
     def recommend_problems(self, failure_analysis: str, current_problem, is_accepted: bool, db, user_id: int) -> tuple:
         from app.models import Problem, PersonalizedDifficultyPrediction
 
-        # Get all unsolved problems (those with predictions for this user)
-        all_predictions = db.query(PersonalizedDifficultyPrediction).filter(
-            PersonalizedDifficultyPrediction.user_id == user_id
-        ).all()
-
-        unsolved_problems = [p.problem for p in all_predictions]
+        # The 3 problems the user is most likely to pass (highest pass_probability), excluding the current one,
+        # in one query on the (user_id, pass_probability) index
+        recommended = db.query(Problem).join(
+            PersonalizedDifficultyPrediction, PersonalizedDifficultyPrediction.problem_id == Problem.id
+        ).filter(
+            PersonalizedDifficultyPrediction.user_id == user_id,
+            Problem.id != current_problem.id
+        ).order_by(PersonalizedDifficultyPrediction.pass_probability.desc(), Problem.id).limit(3).all()
 
-        # Exclude current problem
-        unsolved_problems = [p for p in unsolved_problems if p.id != current_problem.id]
-
-        if not unsolved_problems:
+        if not recommended:
             return ([], "No other unsolved problems available.")
 
-        # Find 3 problems user is most likely to pass (sorted by pass_probability DESC)
-        predictions_dict = {p.problem_id: p.pass_probability for p in all_predictions}
-
-        recommended = sorted(
-            unsolved_problems,
-            key=lambda p: predictions_dict.get(p.id, 0),
-            reverse=True
-        )[:3]
-
         problem_titles = ", ".join([p.title for p in recommended])
         explanation = self._generate_recommendation_explanation(
             is_accepted,
@@ -69,6 +91,18 @@ Respond ONLY with valid JSON:
 
     def _generate_recommendation_explanation(self, is_accepted: bool, current_title: str, rec_titles: str,
                                              current_tags: str) -> str:
+        return LLMClient.run(self._generate_recommendation_explanation_async(
+            is_accepted, current_title, rec_titles, current_tags))
+
+    async def _generate_recommendation_explanation_async(self, is_accepted: bool, current_title: str,
+                                                         rec_titles: str, current_tags: str) -> str:
+        cache = self.explanation_cache
+        key = cache.make_key(self.MODEL, is_accepted, current_title, cache.normalize_list(rec_titles),
+                             cache.normalize_list(current_tags))
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            return cached
+
         context = "solved" if is_accepted else "struggled with"
 
         prompt = f"""You are a competitive programming mentor. A student {context} "{current_title}" (tags: {current_tags}).
@@ -81,12 +115,11 @@ Respond ONLY with valid JSON:
 {{"explanation": "your one sentence explanation"}}"""
 
         try:
-            response = self.client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=100,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            result = json.loads(response.content[0].text)
-            return result.get("explanation", "")[:150]
+            text = await LLMClient.complete(prompt, model=self.MODEL, max_tokens=100)
+            result = json.loads(text)
+            explanation = result.get("explanation", "")[:150]
         except Exception:
-            return "These problems help you strengthen relevant skills."
\ No newline at end of file
+            return "These problems help you strengthen relevant skills."
+
+        asyncio.get_running_loop().run_in_executor(None, cache.put, key, explanation)  # don't wait for the write
+        return explanation
\ No newline at end of file
@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+from app.config import DIFFICULTY_MODEL_PATH, HINT_TIMING_MODEL_PATH, MODEL_BACKEND
+from app.services.personalized_difficulty_model import PersonalizedDifficultyModel
+from app.services.hint_timing_model import HintTimingModel
+from app.services.numpy_mlp import NumpyMLP
+
+
+class ModelRegistry:
+    """Process-wide cache of the trained models.
+
+    Each model (and its scaler) is loaded once and shared by every request thread.
+    When `cli train-models` replaces the files on disk the next `get` loads the new
+    version and swaps it in; callers holding the old instance keep using it safely.
+    An exported `.npz` that is at least as new as the `.h5` is served with NumpyMLP,
+    so TensorFlow is never imported.
+    """
+
+    MODELS = {
+        "difficulty": (PersonalizedDifficultyModel, DIFFICULTY_MODEL_PATH),
+        "hint_timing": (HintTimingModel, HINT_TIMING_MODEL_PATH),
+    }
+
+    _lock = threading.Lock()
+    _entries = {}
+
+    @staticmethod
+    def _scaler_path(model_path: str) -> str:
+        return model_path.replace('.h5', '_scaler.pkl')
+
+    @classmethod
+    def _artifacts(cls, model_path: str) -> tuple:
+        """(backend, files to load): the .npz export unless the Keras files are newer or missing it."""
+        npz_path = NumpyMLP.npz_path(model_path)
+        if MODEL_BACKEND == "numpy" and os.path.exists(npz_path):
+            if not os.path.exists(model_path) or os.path.getmtime(npz_path) >= os.path.getmtime(model_path):
+                return "numpy", (npz_path,)
+        return "keras", (model_path, cls._scaler_path(model_path))
+
+    @classmethod
+    def _file_version(cls, model_path: str) -> str:
+        """Version string derived from the served files' modification times."""
+        _, paths = cls._artifacts(model_path)
+        return "-".join(str(os.stat(p).st_mtime_ns) for p in paths)
+
+    @classmethod
+    def _load(cls, name: str, version: str) -> dict:
+        model_cls, model_path = cls.MODELS[name]
+        backend, paths = cls._artifacts(model_path)
+
+        start = time.perf_counter()
+        if backend == "numpy":
+            model = NumpyMLP.load(paths[0])
+        else:
+            model = model_cls(model_path)
+            model.load()
+        load_time_ms = (time.perf_counter() - start) * 1000
+
+        newest_mtime = max(os.path.getmtime(p) for p in paths)
+        return {
+            "model": model,
+            "backend": backend,
+            "version": version,
+            "trained_at": datetime.fromtimestamp(newest_mtime).isoformat(),
+            "loaded_at": datetime.now().isoformat(),
+            "load_time_ms": round(load_time_ms, 1),
+        }
+
+    @classmethod
+    def get(cls, name: str):
+        """Return the current model instance, reloading it if its files changed."""
+        _, model_path = cls.MODELS[name]
+        entry = cls._entries.get(name)
+
+        try:
+            version = cls._file_version(model_path)
+        except FileNotFoundError:
+            if entry is not None:
+                return entry["model"]
+            raise
+
+        if entry is not None and entry["version"] == version:
+            return entry["model"]
+
+        with cls._lock:
+            entry = cls._entries.get(name)
+            if entry is not None and entry["version"] == version:
+                return entry["model"]
+
+            try:
+                new_entry = cls._load(name, version)
+            except Exception as e:
+                if entry is None:
+                    raise
+                print(f"Warning: Could not reload model '{name}', keeping previous version: {e}")
+                return entry["model"]
+
+            cls._entries[name] = new_entry
+            return new_entry["model"]
+
+    @classmethod
+    def version(cls, name: str):
+        """Version string of the currently loaded model (None if not loaded yet)."""
+        entry = cls._entries.get(name)
+        return entry["version"] if entry else None
+
+    @classmethod
+    def load_all(cls):
+        """Load every registered model (used at application startup)."""
+        for name in cls.MODELS:
+            try:
+                cls.get(name)
+            except Exception as e:
+                print(f"Warning: Could not load model '{name}': {e}")
+
+    @classmethod
+    def status(cls) -> dict:
+        status = {}
+        for name, (_, model_path) in cls.MODELS.items():
+            entry = cls._entries.get(name)
+            status[name] = {
+                "path": model_path,
+                "loaded": entry is not None,
+                "backend": entry["backend"] if entry else None,
+                "version": entry["version"] if entry else None,
+                "trained_at": entry["trained_at"] if entry else None,
+                "loaded_at": entry["loaded_at"] if entry else None,
+                "load_time_ms": entry["load_time_ms"] if entry else None,
+            }
+        return status
@@ -0,0 +1,85 @@
+import os
+
+import numpy as np
+
+
+class NumpyMLP:
+    """Pure-NumPy forward pass for the exported Dense/Dropout MLPs.
+
+    `export` flattens a trained Keras model plus its StandardScaler into one `.npz`
+    (scaler mean/scale, then a kernel, bias and activation per Dense layer; Dropout is the
+    identity at inference and is dropped). `predict` matches `keras.Model.predict` on the
+    scaled input, returning an (n, 1) array, without importing TensorFlow.
+    """
+
+    ACTIVATIONS = {
+        "linear": lambda x: x,
+        "relu": lambda x: np.maximum(x, 0.0),
+        "sigmoid": lambda x: 0.5 * (1.0 + np.tanh(0.5 * x)),  # overflow-free form of 1 / (1 + e^-x)
+        "tanh": np.tanh,
+    }
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray, layers: list):
+        self.mean = mean
+        self.scale = scale
+        self.layers = layers  # [(kernel, bias, activation name)]
+
+    @staticmethod
+    def npz_path(model_path: str) -> str:
+        return model_path.replace('.h5', '.npz')
+
+    @classmethod
+    def export(cls, keras_model, scaler, path: str, install: bool = True) -> str:
+        """Write the weights and scaler to `path`. With install=False the temp file is left for the
+        caller to os.replace (returned either way)."""
+        arrays = {
+            "mean": np.asarray(scaler.mean_, dtype=np.float32),
+            "scale": np.asarray(scaler.scale_, dtype=np.float32),
+        }
+        activations = []
+        for layer in keras_model.layers:
+            kind = type(layer).__name__
+            if kind == "Dropout":
+                continue
+            if kind != "Dense":
+                raise ValueError(f"Cannot export layer type {kind}")
+            activation = layer.activation.__name__
+            if activation not in cls.ACTIVATIONS:
+                raise ValueError(f"Cannot export activation {activation}")
+
+            kernel, bias = layer.get_weights()
+            arrays[f"kernel_{len(activations)}"] = kernel.astype(np.float32)
+            arrays[f"bias_{len(activations)}"] = bias.astype(np.float32)
+            activations.append(activation)
+        arrays["activations"] = np.array(activations)
+
+        # Same temp-file-and-rename pattern as the .h5 save, so the registry never sees a partial file
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        if not install:
+            return tmp_path
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as data:
+            activations = [str(a) for a in data["activations"]]
+            layers = [
+                (data[f"kernel_{i}"], data[f"bias_{i}"], activation)
+                for i, activation in enumerate(activations)
+            ]
+            return cls(data["mean"], data["scale"], layers)
+
+    def predict(self, X: np.ndarray, batch_size: int = 4096) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        outputs = []
+        for start in range(0, len(X), batch_size):
+            h = (X[start:start + batch_size] - self.mean) / self.scale
+            for kernel, bias, activation in self.layers:
+                h = self.ACTIVATIONS[activation](h @ kernel + bias)
+            outputs.append(h)
+        if not outputs:
+            return np.zeros((0, self.layers[-1][0].shape[1]), dtype=np.float32)
+        return np.concatenate(outputs)
@@ -1,17 +1,18 @@
-import tensorflow as tf
-from tensorflow import keras
-from sklearn.preprocessing import StandardScaler
 import numpy as np
 import pickle
+import os
 
 
 class PersonalizedDifficultyModel:
     def __init__(self, model_path: str):
         self.model_path = model_path
-        self.scaler = StandardScaler()
+        self.scaler = None
         self.model = None
 
     def build_model(self, input_dim: int):
+        # TensorFlow is imported on first use so importing this module stays cheap
+        from tensorflow import keras
+
         self.model = keras.Sequential([
             keras.layers.Dense(64, activation='relu', input_dim=input_dim),
             keras.layers.Dropout(0.2),
@@ -27,6 +28,9 @@ class PersonalizedDifficultyModel:
         )
 
     def train(self, X_train: np.ndarray, y_train: np.ndarray, epochs: int = 50, batch_size: int = 32):
+        from sklearn.preprocessing import StandardScaler
+
+        self.scaler = StandardScaler()
         X_scaled = self.scaler.fit_transform(X_train)
 
         history = self.model.fit(
@@ -39,20 +43,45 @@ class PersonalizedDifficultyModel:
 
         return history
 
-    def predict(self, X: np.ndarray) -> np.ndarray:
+    def predict(self, X: np.ndarray, batch_size: int = 4096) -> np.ndarray:
         if self.model is None:
             self.load()
 
         X_scaled = self.scaler.transform(X)
-        return self.model.predict(X_scaled, verbose=0)
+        return self.model.predict(X_scaled, batch_size=batch_size, verbose=0)
+
+    def save(self, export_npz: bool = False):
+        # Write to temp files and rename so a running server never loads a half-written model
+        tmp_model_path = self.model_path.replace('.h5', '.tmp.h5')
+        self.model.save(tmp_model_path)
 
-    def save(self):
-        self.model.save(self.model_path)
         scaler_path = self.model_path.replace('.h5', '_scaler.pkl')
-        with open(scaler_path, 'wb') as f:
+        tmp_scaler_path = scaler_path + '.tmp'
+        with open(tmp_scaler_path, 'wb') as f:
             pickle.dump(self.scaler, f)
 
+        if export_npz:
+            # Written last and installed first: the registry serves an .npz at least as new as the .h5,
+            # so it goes straight from the old .npz to the new one and never loads the Keras files
+            from app.services.numpy_mlp import NumpyMLP
+
+            npz_path = NumpyMLP.npz_path(self.model_path)
+            os.replace(NumpyMLP.export(self.model, self.scaler, npz_path, install=False), npz_path)
+
+        os.replace(tmp_scaler_path, scaler_path)
+        os.replace(tmp_model_path, self.model_path)
+
+    def export_npz(self) -> str:
+        """Write the weights and scaler to a .npz for TensorFlow-free serving (see NumpyMLP)."""
+        from app.services.numpy_mlp import NumpyMLP
+
+        npz_path = NumpyMLP.npz_path(self.model_path)
+        NumpyMLP.export(self.model, self.scaler, npz_path)
+        return npz_path
+
     def load(self):
+        from tensorflow import keras
+
         self.model = keras.models.load_model(self.model_path)
         scaler_path = self.model_path.replace('.h5', '_scaler.pkl')
         with open(scaler_path, 'rb') as f:
@@ -0,0 +1,132 @@
+import threading
+
+import numpy as np
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session, object_session
+
+from app.models import Problem
+from app.services.feature_store import ALL_TAGS, DIFFICULTY_MAP, parse_tags
+
+
+class ProblemFeatureCache:
+    """In-memory (n_problems, 7) matrix of problem features: tag one-hots + difficulty code.
+
+    Built once from the problems table, then kept current by this process's ORM
+    inserts, updates and deletes once they commit. Changes made by another process or node
+    (e.g. `cli seed-problems`) are picked up by a cheap indexed check on `get`: row count,
+    max id and the newest `features_updated_at`. Scoring a user is then one broadcast
+    against this matrix, with no per-problem Python work.
+    """
+
+    N_FEATURES = len(ALL_TAGS) + 1
+
+    _lock = threading.Lock()
+    _ids = None       # int64 array of problem ids, row order of _matrix
+    _matrix = None
+    _rows = {}        # problem_id -> row
+    _signature = None  # signature() when last synced
+
+    @classmethod
+    def problem_vector(cls, tags: str, difficulty: str) -> np.ndarray:
+        tags_list = parse_tags(tags)
+        problem_tags = [1.0 if tag in tags_list else 0.0 for tag in ALL_TAGS]
+        return np.array(problem_tags + [DIFFICULTY_MAP.get(difficulty, 0)], dtype=np.float64)
+
+    @staticmethod
+    def signature(db) -> tuple:
+        """(count, max id, newest features_updated_at) of the problems table; changes whenever the features do."""
+        return tuple(db.query(
+            func.count(Problem.id), func.max(Problem.id), func.max(Problem.features_updated_at)
+        ).one())
+
+    @classmethod
+    def _build(cls, db):
+        rows = db.query(Problem.id, Problem.tags, Problem.difficulty).order_by(Problem.id).all()
+        matrix = np.zeros((len(rows), cls.N_FEATURES), dtype=np.float64)
+        for i, (_, tags, difficulty) in enumerate(rows):
+            matrix[i] = cls.problem_vector(tags, difficulty)
+        cls._ids = np.array([r[0] for r in rows], dtype=np.int64)
+        cls._matrix = matrix
+        cls._rows = {int(pid): i for i, pid in enumerate(cls._ids)}
+
+    @classmethod
+    def get(cls, db) -> tuple:
+        """(problem ids, feature matrix) for the whole catalog. Treat both as read-only."""
+        signature = cls.signature(db)
+        with cls._lock:
+            if cls._matrix is None or signature != cls._signature:
+                cls._build(db)
+                cls._signature = signature
+            return cls._ids, cls._matrix
+
+    @classmethod
+    def upsert(cls, problem_id: int, tags: str, difficulty: str, updated_at: str = None):
+        with cls._lock:
+            if cls._matrix is None:
+                return  # not built yet; the first `get` reads the table
+            vector = cls.problem_vector(tags, difficulty)
+            row = cls._rows.get(problem_id)
+            count, max_id, last_update = cls._signature
+            if row is None:
+                # Copy-on-write so readers holding the previous arrays are unaffected
+                cls._ids = np.append(cls._ids, problem_id)
+                cls._matrix = np.vstack([cls._matrix, vector])
+                cls._rows[problem_id] = len(cls._ids) - 1
+                count, max_id = count + 1, max(max_id or 0, problem_id)
+            else:
+                matrix = cls._matrix.copy()
+                matrix[row] = vector
+                cls._matrix = matrix
+            cls._signature = (count, max_id, max(filter(None, (last_update, updated_at)), default=None))
+
+    @classmethod
+    def remove(cls, problem_id: int):
+        with cls._lock:
+            if cls._matrix is not None and problem_id in cls._rows:
+                # Rare; force a rebuild on the next `get`
+                cls._matrix = None
+
+    @classmethod
+    def invalidate(cls):
+        with cls._lock:
+            cls._matrix = None
+
+
+PENDING_KEY = "problem_feature_changes"  # session.info entry: {problem_id: (tags, difficulty, updated_at) or None}
+
+
+def _queue_change(target):
+    # Applied in after_commit, so rows that are rolled back never reach the cache
+    object_session(target).info.setdefault(PENDING_KEY, {})[target.id] = (
+        target.tags, target.difficulty, target.features_updated_at
+    )
+
+
+@event.listens_for(Problem, "after_insert")
+def _problem_inserted(mapper, connection, target):
+    _queue_change(target)
+
+
+@event.listens_for(Problem, "after_update")
+def _problem_updated(mapper, connection, target):
+    if target.features_changed():  # not for e.g. a new embedding
+        _queue_change(target)
+
+
+@event.listens_for(Problem, "after_delete")
+def _problem_deleted(mapper, connection, target):
+    object_session(target).info.setdefault(PENDING_KEY, {})[target.id] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_problem_changes(session):
+    for problem_id, change in session.info.pop(PENDING_KEY, {}).items():
+        if change is None:
+            ProblemFeatureCache.remove(problem_id)
+        else:
+            ProblemFeatureCache.upsert(problem_id, *change)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_problem_changes(session):
+    session.info.pop(PENDING_KEY, None)
@@ -0,0 +1,131 @@
+import queue
+import threading
+import time
+from collections import deque
+
+
+class RecomputeQueue:
+    """In-process job queue that runs per-user prediction recomputes on worker threads.
+
+    Jobs are coalesced per user: while a user is waiting in the queue further requests
+    are dropped, and requests that arrive while their recompute is running schedule
+    exactly one follow-up run so the latest submission is always reflected.
+    """
+
+    LATENCY_WINDOW = 200
+
+    def __init__(self, job_fn, n_workers: int = 2):
+        self._job_fn = job_fn
+        self._n_workers = n_workers
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = []
+
+        self._pending = {}  # user_id -> enqueued_at, waiting in the queue
+        self._running = set()
+        self._rerun = {}  # user_id -> enqueued_at, requested while running
+
+        self._enqueued = 0
+        self._coalesced = 0
+        self._completed = 0
+        self._failed = 0
+        self._latencies = deque(maxlen=self.LATENCY_WINDOW)  # enqueue -> done, seconds
+        self._durations = deque(maxlen=self.LATENCY_WINDOW)  # job run time, seconds
+
+    def start(self):
+        with self._lock:
+            if self._workers:
+                return
+            for i in range(self._n_workers):
+                worker = threading.Thread(target=self._worker_loop, name=f"recompute-{i}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def stop(self, timeout: float = 5.0):
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for _ in workers:
+            self._queue.put(None)
+        for worker in workers:
+            worker.join(timeout)
+
+    def enqueue(self, user_id: int) -> bool:
+        """Schedule a recompute for a user. Returns False if it was coalesced into a pending one."""
+        self.start()
+        now = time.monotonic()
+        with self._lock:
+            if user_id in self._pending or user_id in self._rerun:
+                self._coalesced += 1
+                return False
+
+            self._enqueued += 1
+            if user_id in self._running:
+                self._rerun[user_id] = now
+                return True
+
+            self._pending[user_id] = now
+        self._queue.put(user_id)
+        return True
+
+    def is_pending(self, user_id: int) -> bool:
+        with self._lock:
+            return user_id in self._pending or user_id in self._running or user_id in self._rerun
+
+    def _worker_loop(self):
+        while True:
+            user_id = self._queue.get()
+            if user_id is None:
+                return
+
+            with self._lock:
+                enqueued_at = self._pending.pop(user_id)
+                self._running.add(user_id)
+
+            start = time.monotonic()
+            try:
+                self._job_fn(user_id)
+                failed = False
+            except Exception as e:
+                print(f"Warning: Could not recompute predictions for user {user_id}: {e}")
+                failed = True
+            done = time.monotonic()
+
+            with self._lock:
+                self._running.discard(user_id)
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+                self._latencies.append(done - enqueued_at)
+                self._durations.append(done - start)
+
+                rerun_at = self._rerun.pop(user_id, None)
+                if rerun_at is not None:
+                    self._pending[user_id] = rerun_at
+                    self._queue.put(user_id)
+
+    @staticmethod
+    def _summarize(samples) -> dict:
+        if not samples:
+            return {"avg_ms": None, "p50_ms": None, "p95_ms": None, "max_ms": None}
+        ordered = sorted(samples)
+        return {
+            "avg_ms": round(sum(ordered) / len(ordered) * 1000, 1),
+            "p50_ms": round(ordered[len(ordered) // 2] * 1000, 1),
+            "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1),
+            "max_ms": round(ordered[-1] * 1000, 1),
+        }
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "workers": len(self._workers),
+                "depth": len(self._pending) + len(self._rerun),
+                "running": len(self._running),
+                "enqueued": self._enqueued,
+                "coalesced": self._coalesced,
+                "completed": self._completed,
+                "failed": self._failed,
+                "latency": self._summarize(list(self._latencies)),
+                "duration": self._summarize(list(self._durations)),
+            }
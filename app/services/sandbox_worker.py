@@ -0,0 +1,166 @@
+"""Long-lived worker process for the warm executor pool.
+
+Runs standalone (`python sandbox_worker.py '<rlimits json>'`), so it imports nothing from
+the app. Requests and responses are length-prefixed JSON frames on the original stdin/stdout
+file descriptors; fds 0-2 are then pointed away so user code can't corrupt the protocol.
+Each run happens in a child forked from this already-started interpreter, and only that child
+takes the rlimits, so one submission can't leave builtins, modules or open files behind for the
+next and the worker itself can always fork.
+"""
+import builtins
+import json
+import os
+import resource
+import signal
+import struct
+import sys
+import tempfile
+import time
+import traceback
+
+HEADER = struct.Struct(">I")
+
+
+def _read_exact(fd: int, n: int) -> bytes:
+    chunks = []
+    while n > 0:
+        chunk = os.read(fd, n)
+        if not chunk:
+            raise EOFError
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b"".join(chunks)
+
+
+def _write_all(fd: int, data: bytes):
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def _apply_limits(limits: dict):
+    for name, limit in limits.items():
+        # Hard CPU limit one second later so the soft limit delivers SIGXCPU rather than SIGKILL
+        hard = limit + 1 if name == "RLIMIT_CPU" else limit
+        try:
+            resource.setrlimit(getattr(resource, name), (limit, hard))
+        except (OSError, ValueError):
+            pass
+
+
+def _exec_child(code: str):
+    """Run the submission in the forked child like `python -c` would, then exit. Never returns."""
+    # Real file objects on fds 0-2, so .buffer, fileno() and os.write(1, ...) behave as in spawn mode
+    sys.stdin = sys.__stdin__ = open(0, "r", encoding="utf-8", closefd=False)
+    sys.stdout = sys.__stdout__ = open(1, "w", encoding="utf-8", closefd=False)
+    sys.stderr = sys.__stderr__ = open(2, "w", encoding="utf-8", closefd=False)
+    stderr = sys.stderr
+
+    exit_code = 0
+    try:
+        exec(compile(code, "<string>", "exec"), {"__name__": "__main__", "__builtins__": builtins})
+    except SystemExit as e:
+        if e.code is None:
+            exit_code = 0
+        elif isinstance(e.code, int):
+            exit_code = e.code
+        else:
+            stderr.write(f"{e.code}\n")
+            exit_code = 1
+    except BaseException as e:
+        # Drop this frame so the traceback matches `python -c`
+        stderr.write("".join(traceback.format_exception(type(e), e, e.__traceback__.tb_next)))
+        exit_code = 1
+
+    # A process forked by user code (RLIMIT_NPROC doesn't bind root) gets here too and exits the same way
+    for stream in (sys.stdout, sys.stderr, stderr):
+        try:
+            stream.flush()
+        except Exception:
+            pass
+    os._exit(exit_code & 0xFF)
+
+
+def _run(code: str, stdin: str, limits: dict) -> dict:
+    with tempfile.TemporaryFile() as stdin_file, tempfile.TemporaryFile() as stdout_file, \
+            tempfile.TemporaryFile() as stderr_file:
+        stdin_file.write(stdin.encode())
+        stdin_file.flush()
+        stdin_file.seek(0)
+
+        start = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                for fd, f in ((0, stdin_file), (1, stdout_file), (2, stderr_file)):
+                    os.dup2(f.fileno(), fd)
+                os.closerange(3, resource.getrlimit(resource.RLIMIT_NOFILE)[0])  # incl. the protocol pipes
+                _apply_limits(limits)
+                _exec_child(code)
+            finally:
+                os._exit(1)
+
+        _, status, usage = os.wait4(pid, 0)
+        wall_time = time.perf_counter() - start
+        exit_code = os.waitstatus_to_exitcode(status)
+
+        # RLIMIT_FSIZE stops each file at the limit (Python ignores SIGXFSZ, so writes fail instead)
+        output_limit = limits.get("RLIMIT_FSIZE")
+        sizes = [os.fstat(f.fileno()).st_size for f in (stdout_file, stderr_file)]
+        output_exceeded = output_limit is not None and (max(sizes) >= output_limit or sum(sizes) > output_limit)
+        if output_exceeded:
+            stdout = stderr = ""
+        else:
+            stdout_file.seek(0)
+            stderr_file.seek(0)
+            stdout = stdout_file.read().decode(errors="replace")
+            stderr = stderr_file.read().decode(errors="replace")
+
+    # Same rule as CodeExecutor._is_memory_error: a MemoryError, or a crash signal near the address-space limit
+    memory_limit = limits.get("RLIMIT_AS")
+    memory_error = exit_code != 0 and (
+        "MemoryError" in stderr.strip().split("\n")[-1]
+        or (exit_code < 0 and exit_code != -signal.SIGXCPU and memory_limit is not None
+            and usage.ru_maxrss * 1024 >= 0.9 * memory_limit)
+    )
+    return {
+        "stdout": stdout,
+        "stderr": stderr,
+        "exit_code": exit_code,
+        "memory_error": memory_error,
+        "output_exceeded": output_exceeded,
+        "metrics": {
+            "wall_time_ms": round(wall_time * 1000, 1),
+            "cpu_time_ms": round((usage.ru_utime + usage.ru_stime) * 1000, 1),
+            "max_rss_kb": usage.ru_maxrss,
+        },
+    }
+
+
+def main():
+    limits = json.loads(sys.argv[1]) if len(sys.argv) > 1 else {}
+
+    proto_in, proto_out = os.dup(0), os.dup(1)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+
+    while True:
+        try:
+            (length,) = HEADER.unpack(_read_exact(proto_in, HEADER.size))
+            request = json.loads(_read_exact(proto_in, length))
+        except EOFError:
+            return
+
+        try:
+            response = _run(request["code"], request["stdin"], limits)
+        except Exception as e:
+            # e.g. fork() failing with EAGAIN; report it and stay up for the next run
+            response = {"error": f"{e.__class__.__name__}: {e}"}
+        response = json.dumps(response).encode()
+        _write_all(proto_out, HEADER.pack(len(response)) + response)
+
+
+if __name__ == "__main__":
+    main()
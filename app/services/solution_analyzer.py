@@ -2,6 +2,32 @@ import difflib
 
 
 class SolutionAnalyzer:
+    # Failure classes a hint can be pre-generated for: class -> (judge status, representative analysis)
+    FAILURE_CLASSES = {
+        "tle": ("tle", "Algorithm is too slow; likely nested loops or inefficient approach"),
+        "mle": ("mle", "Memory limit exceeded; the solution keeps far more data than it needs"),
+        "runtime": ("runtime", "Code crashes; check array bounds, division by zero, or null references"),
+        "wrong_answer": ("wrong_answer", "Logic error; trace through with a sample input step-by-step"),
+        "wrong_answer:missing_step": ("wrong_answer", "Missing key step of the intended approach"),
+        "wrong_answer:logic_differs": ("wrong_answer", "Logic differs from correct approach"),
+    }
+
+    @staticmethod
+    def failure_class(failure_type: str, analysis: str):
+        """Map a judge status and its analysis (from `analyze_mistake` or the judge) to a FAILURE_CLASSES key.
+
+        None for statuses that get no hint (accepted, syntax).
+        """
+        if failure_type in ("tle", "mle", "runtime"):
+            return failure_type
+        if failure_type != "wrong_answer":
+            return None
+        if (analysis or "").startswith("Missing key step"):
+            return "wrong_answer:missing_step"
+        if (analysis or "").startswith("Logic differs"):
+            return "wrong_answer:logic_differs"
+        return "wrong_answer"
+
     @staticmethod
     def analyze_mistake(user_code: str, correct_code: str, failure_type: str) -> str:
         if failure_type == "syntax":
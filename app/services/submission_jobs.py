@@ -0,0 +1,91 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SubmissionJobs:
+    """In-memory registry of asynchronous submissions and the progress events they emit.
+
+    `submit(fn)` runs `fn(emit)` on a worker thread, where `emit(event, data)` appends a
+    progress event. The value returned by `fn` is stored as the job result and emitted as
+    a final "result" event; an exception is stored and emitted as an "error" event.
+    Finished jobs are forgotten after TTL_SECONDS.
+    """
+
+    TTL_SECONDS = 600
+
+    def __init__(self, n_workers: int = 4):
+        self._executor = ThreadPoolExecutor(max_workers=n_workers, thread_name_prefix="submission")
+        self._lock = threading.Lock()
+        self._jobs = {}
+
+    def submit(self, fn) -> str:
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "status": "queued",
+            "events": [],
+            "result": None,
+            "error": None,
+            "finished_at": None,
+        }
+        with self._lock:
+            self._prune()
+            self._jobs[job_id] = job
+
+        self._executor.submit(self._run, job, fn)
+        return job_id
+
+    def _run(self, job: dict, fn):
+        job["status"] = "running"
+        try:
+            result = fn(lambda event, data: self._emit(job, event, data))
+        except Exception as e:
+            error = str(getattr(e, "detail", e))
+            with self._lock:
+                job["error"] = error
+                self._append(job, "error", {"detail": error})
+                job["status"] = "failed"
+                job["finished_at"] = time.monotonic()
+            return
+
+        with self._lock:
+            job["result"] = result
+            self._append(job, "result", result)
+            job["status"] = "done"
+            job["finished_at"] = time.monotonic()
+
+    def _emit(self, job: dict, event: str, data: dict):
+        with self._lock:
+            self._append(job, event, data)
+
+    @staticmethod
+    def _append(job: dict, event: str, data: dict):
+        job["events"].append({"id": len(job["events"]), "event": event, "data": data})
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.TTL_SECONDS
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job["finished_at"] is not None and job["finished_at"] < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str):
+        """Snapshot of a job (or None if unknown/expired)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {**job, "events": list(job["events"])}
+
+    def events_since(self, job_id: str, cursor: int) -> tuple:
+        """Return (events with id >= cursor, finished). `finished` means no more events will follow."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return ([], True)
+            return (job["events"][cursor:], job["finished_at"] is not None)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,152 @@
+import os
+import threading
+
+import numpy as np
+
+
+class ProblemVectorIndex:
+    """In-memory cosine-similarity index over problem embeddings.
+
+    Embeddings are L2-normalized and stored as rows of one contiguous float32 matrix, so a
+    top-k query is a single matrix-vector product plus `argpartition`. Rows are updated in
+    place as problems are (re-)embedded. The index persists as two .npy files (vectors and
+    problem ids) that are memory-mapped on load, so startup doesn't read the DB blobs.
+    `signature` identifies the files an index was loaded from or saved to, so readers can
+    notice when another process rewrites them.
+    """
+
+    def __init__(self, dim: int = None):
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._matrix = np.zeros((0, dim or 0), dtype=np.float32)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._size = 0
+        self._rows = {}  # problem_id -> row
+        self.signature = None
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, problem_id: int):
+        return problem_id in self._rows
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _ensure_capacity(self, n: int):
+        """Grow (and un-memory-map) the backing arrays to hold n rows, doubling capacity."""
+        capacity = self._matrix.shape[0]
+        writable = isinstance(self._matrix, np.ndarray) and not isinstance(self._matrix, np.memmap)
+        if n <= capacity and writable:
+            return
+
+        new_capacity = max(n, capacity * 2 if n > capacity else capacity, 16)
+        matrix = np.zeros((new_capacity, self.dim), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        ids = np.zeros(new_capacity, dtype=np.int64)
+        ids[:self._size] = self._ids[:self._size]
+        self._matrix, self._ids = matrix, ids
+
+    def upsert(self, problem_id: int, embedding: np.ndarray):
+        self.upsert_many([problem_id], np.asarray(embedding).reshape(1, -1))
+
+    def upsert_many(self, problem_ids: list, embeddings: np.ndarray):
+        embeddings = self._normalize(np.asarray(embeddings).reshape(len(problem_ids), -1))
+        with self._lock:
+            if self.dim is None:
+                self.dim = embeddings.shape[1]
+                self._matrix = np.zeros((0, self.dim), dtype=np.float32)
+            if embeddings.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {embeddings.shape[1]} does not match index ({self.dim})")
+
+            new_ids = [pid for pid in dict.fromkeys(problem_ids) if pid not in self._rows]
+            self._ensure_capacity(self._size + len(new_ids))
+            for pid in new_ids:
+                self._rows[pid] = self._size
+                self._ids[self._size] = pid
+                self._size += 1
+
+            rows = [self._rows[pid] for pid in problem_ids]
+            self._matrix[rows] = embeddings
+
+    def remove(self, problem_id: int):
+        with self._lock:
+            row = self._rows.pop(problem_id, None)
+            if row is None:
+                return
+            self._ensure_capacity(self._size)
+            last = self._size - 1
+            if row != last:
+                # Move the last row into the hole to keep the matrix contiguous
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = self._ids[last]
+                self._rows[int(self._ids[row])] = row
+            self._size -= 1
+
+    def search(self, query: np.ndarray, k: int = 10, exclude_ids=()) -> list:
+        """Top-k [(problem_id, cosine similarity)], most similar first."""
+        matrix, ids, size = self._matrix, self._ids, self._size
+        if size == 0 or k <= 0:
+            return []
+
+        scores = matrix[:size] @ self._normalize(query)
+        if exclude_ids:
+            excluded = [self._rows[pid] for pid in exclude_ids if pid in self._rows]
+            scores[excluded] = -np.inf
+
+        k = min(k, size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top if scores[i] != -np.inf]
+
+    def scores_for(self, query: np.ndarray, problem_ids: list) -> np.ndarray:
+        """Cosine similarity of the query to each given problem (NaN for problems not indexed)."""
+        rows = np.array([self._rows.get(pid, -1) for pid in problem_ids], dtype=np.int64)
+        scores = np.full(len(problem_ids), np.nan, dtype=np.float32)
+        present = rows >= 0
+        if present.any():
+            scores[present] = self._matrix[rows[present]] @ self._normalize(query)
+        return scores
+
+    def save(self, path: str):
+        """Write `<path>.npy` (vectors) and `<path>_ids.npy` atomically."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._lock:
+            matrix = np.ascontiguousarray(self._matrix[:self._size])
+            ids = self._ids[:self._size].copy()
+
+        for suffix, array in (("_ids.npy", ids), (".npy", matrix)):
+            tmp_path = f"{path}{suffix}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp_path, f"{path}{suffix}")
+        self.signature = self.file_signature(path)
+
+    @staticmethod
+    def file_signature(path: str):
+        """(mtime_ns, size) of both index files, or None if either is missing."""
+        try:
+            return tuple((st.st_mtime_ns, st.st_size) for st in (os.stat(f"{path}.npy"), os.stat(f"{path}_ids.npy")))
+        except OSError:
+            return None
+
+    @classmethod
+    def load(cls, path: str):
+        """Memory-map a saved index; returns None if it doesn't exist."""
+        signature = cls.file_signature(path)  # before reading, so a concurrent rewrite shows up as a change
+        if signature is None:
+            return None
+
+        matrix = np.load(f"{path}.npy", mmap_mode="r")
+        ids = np.load(f"{path}_ids.npy")
+        if len(ids) != matrix.shape[0]:
+            return None
+
+        index = cls(dim=matrix.shape[1])
+        index._matrix, index._ids, index._size = matrix, ids, len(ids)
+        index._rows = {int(pid): row for row, pid in enumerate(ids)}
+        index.signature = signature
+        return index
@@ -0,0 +1,115 @@
+import ast
+import hashlib
+import json
+from datetime import datetime
+
+from app.database import SessionLocal
+from app.models import VerdictCacheEntry
+from app.services.lru_cache import LRUCache
+from app.services.worker_pool import JUDGE_ERROR
+
+
+class VerdictCache:
+    """Content-addressed cache of judge verdicts.
+
+    The key hashes the problem's tests together with the submitted code normalized by
+    `ast.dump` (so whitespace and comments don't matter) and the judge limits. Editing a
+    problem's tests changes the key, so stale verdicts are never served. Entries live in an
+    in-memory LRU, optionally backed by the verdict_cache table for sharing across workers
+    and restarts. Only verdicts that follow from the code and tests alone are stored: TLE and
+    MLE depend on host load, and judge errors on the worker that ran them. Runtime errors quote
+    line numbers in their traceback, so they are stored under an `exact` key of the source text.
+    """
+
+    UNCACHED_STATUSES = ("tle", "mle", "cancelled")
+    EXACT_STATUSES = ("runtime",)
+    EXACT_PREFIX = "src:"
+
+    def __init__(self, max_size: int = 1024, persist: bool = False, judge_fingerprint: str = ""):
+        self.persist = persist
+        self.judge_fingerprint = judge_fingerprint
+        self._memory = LRUCache(max_size)
+        self.db_hits = 0
+
+    @staticmethod
+    def tests_hash(tests: list) -> str:
+        """Hash of (input, expected) pairs, in judging order."""
+        return hashlib.sha256(json.dumps(tests).encode()).hexdigest()
+
+    def make_key(self, tests: list, code: str, exact: bool = False):
+        """Cache key, or None for code that doesn't parse (syntax errors are judged without running).
+
+        With `exact`, the key covers the source text as submitted instead of its AST.
+        """
+        try:
+            normalized = ast.dump(ast.parse(code))
+        except (SyntaxError, ValueError):
+            return None
+
+        digest = hashlib.sha256()
+        for part in (self.judge_fingerprint, self.tests_hash(tests), code if exact else normalized):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return (self.EXACT_PREFIX if exact else "") + digest.hexdigest()
+
+    @classmethod
+    def needs_exact_key(cls, verdict: tuple) -> bool:
+        return verdict[0] in cls.EXACT_STATUSES
+
+    @classmethod
+    def _servable(cls, key: str, verdict: tuple) -> bool:
+        # A runtime verdict under a normalized key (stored before exact keys) may quote other line numbers
+        return cls.cacheable(verdict) and (key.startswith(cls.EXACT_PREFIX) or not cls.needs_exact_key(verdict))
+
+    @classmethod
+    def cacheable(cls, verdict: tuple) -> bool:
+        status, analysis, _ = verdict
+        return status not in cls.UNCACHED_STATUSES and JUDGE_ERROR not in (analysis or "")
+
+    def get(self, key: str):
+        """Return (status, analysis, test_results) or None."""
+        verdict = self._memory.get(key)
+        if verdict is not None or not self.persist:
+            return verdict
+
+        db = SessionLocal()
+        try:
+            entry = db.query(VerdictCacheEntry).filter(VerdictCacheEntry.key == key).first()
+            if not entry:
+                return None
+            verdict = (entry.status, entry.failure_analysis, json.loads(entry.test_results or "[]"))
+        finally:
+            db.close()
+        if not self._servable(key, verdict):
+            return None  # stored before such verdicts were skipped or keyed exactly
+
+        self.db_hits += 1
+        self._memory.put(key, verdict)
+        return verdict
+
+    def put(self, key: str, verdict: tuple):
+        if not self._servable(key, verdict):
+            return
+        self._memory.put(key, verdict)
+        if not self.persist:
+            return
+
+        status, analysis, test_results = verdict
+        db = SessionLocal()
+        try:
+            db.merge(VerdictCacheEntry(
+                key=key,
+                status=status,
+                failure_analysis=analysis,
+                test_results=json.dumps(test_results),
+                created_at=datetime.now().isoformat()
+            ))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Warning: Could not persist verdict: {e}")
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        return {**self._memory.stats(), "persistent": self.persist, "db_hits": self.db_hits}
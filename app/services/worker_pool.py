@@ -0,0 +1,172 @@
+import json
+import os
+import queue
+import select
+import shutil
+import signal
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_worker.py")
+HEADER = struct.Struct(">I")
+JUDGE_ERROR = "Judge error"  # prefixes failures of the judge itself (crashed worker, failed spawn), not the program
+OUTPUT_LIMIT_EXCEEDED = "Output Limit Exceeded"
+
+
+class _Worker:
+    """One pre-started interpreter running sandbox_worker.py."""
+
+    def __init__(self, limits: dict):
+        self.workdir = tempfile.mkdtemp(prefix="judge-")
+        try:
+            self.proc = subprocess.Popen(
+                ['python', WORKER_SCRIPT, json.dumps(limits)],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                cwd=self.workdir,
+                start_new_session=True,  # kill() takes down the forked run and anything it started too
+                env={"PATH": os.environ.get("PATH", ""), "PYTHONDONTWRITEBYTECODE": "1"},
+            )
+        except BaseException:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+            raise
+        self.runs = 0
+
+    def send(self, code: str, stdin: str):
+        payload = json.dumps({"code": code, "stdin": stdin}).encode()
+        self.proc.stdin.write(HEADER.pack(len(payload)) + payload)
+        self.proc.stdin.flush()
+
+    def wait_readable(self, timeout: float) -> bool:
+        ready, _, _ = select.select([self.proc.stdout.fileno()], [], [], timeout)
+        return bool(ready)
+
+    def recv(self) -> dict:
+        fd = self.proc.stdout.fileno()
+        (length,) = HEADER.unpack(self._read_exact(fd, HEADER.size))
+        return json.loads(self._read_exact(fd, length))
+
+    @staticmethod
+    def _read_exact(fd: int, n: int) -> bytes:
+        chunks = []
+        while n > 0:
+            chunk = os.read(fd, n)
+            if not chunk:
+                raise EOFError("worker exited")
+            chunks.append(chunk)
+            n -= len(chunk)
+        return b"".join(chunks)
+
+    def kill(self):
+        try:
+            os.killpg(self.proc.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        try:
+            self.proc.wait()
+        except Exception:
+            pass
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class WarmWorkerPool:
+    """Pre-started Python workers that run submissions without paying interpreter startup.
+
+    A worker runs each submission in a child forked from its clean interpreter, under the
+    given rlimits, so runs never share interpreter state. It is recycled after `max_runs`
+    runs, or immediately after a crash, timeout or cancellation. `run` has the same
+    (success, stdout, stderr, metrics) contract as `CodeExecutor.execute_code`.
+    """
+
+    CANCEL_POLL_INTERVAL = 0.05
+    ACQUIRE_TIMEOUT = 30  # seconds `run` waits for an idle worker before giving up with a judge error
+    REPLACE_RETRY_MAX_DELAY = 5.0
+
+    def __init__(self, size: int, max_runs: int = 50, limits: dict = None):
+        self.size = size
+        self.max_runs = max_runs
+        self.limits = limits or {}
+        self._idle = queue.Queue()
+        for _ in range(size):
+            self._idle.put(_Worker(self.limits))
+
+    def _replace(self, worker: _Worker):
+        worker.kill()
+        # Keep trying: a slot that is never refilled would leave `run` short of workers for good
+        delay = 0.1
+        while True:
+            try:
+                self._idle.put(_Worker(self.limits))
+                return
+            except Exception as e:
+                print(f"Warning: Could not start sandbox worker, retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, self.REPLACE_RETRY_MAX_DELAY)
+
+    def _release(self, worker: _Worker, healthy: bool):
+        if healthy and worker.runs < self.max_runs and worker.proc.poll() is None:
+            self._idle.put(worker)
+        else:
+            # Start the replacement off the caller's thread so the verdict isn't delayed
+            threading.Thread(target=self._replace, args=(worker,), daemon=True).start()
+
+    def run(self, code: str, test_input: str, timeout: float, cancel: threading.Event = None) -> tuple:
+        try:
+            worker = self._idle.get(timeout=self.ACQUIRE_TIMEOUT)
+        except queue.Empty:
+            return (False, "", f"{JUDGE_ERROR}: no sandbox worker available", {})
+        worker.runs += 1
+        healthy = False
+        start = time.monotonic()
+        try:
+            worker.send(code, test_input)
+
+            deadline = start + timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return (False, "", "Time Limit Exceeded", {"wall_time_ms": round(timeout * 1000, 1)})
+                if cancel is not None and cancel.is_set():
+                    return (False, "", "Cancelled", {})
+                if worker.wait_readable(min(remaining, self.CANCEL_POLL_INTERVAL) if cancel else remaining):
+                    break
+
+            result = worker.recv()
+            healthy = True
+            if "error" in result:
+                # The worker couldn't run it (e.g. fork failed) but is still serving
+                return (False, "", f"{JUDGE_ERROR}: {result['error']}", {})
+        except EOFError as e:
+            wall_time = {"wall_time_ms": round((time.monotonic() - start) * 1000, 1)}
+            if worker.proc.wait() == -signal.SIGXCPU:
+                return (False, "", "Time Limit Exceeded", wall_time)
+            return (False, "", f"{JUDGE_ERROR}: {e}", wall_time)
+        except Exception as e:
+            return (False, "", f"{JUDGE_ERROR}: {e}", {})
+        finally:
+            self._release(worker, healthy)
+
+        if result["exit_code"] == -signal.SIGXCPU:
+            return (False, "", "Time Limit Exceeded", result["metrics"])
+
+        if result["output_exceeded"]:
+            return (False, "", OUTPUT_LIMIT_EXCEEDED, result["metrics"])
+
+        if result["memory_error"]:
+            return (False, result["stdout"], "Memory Limit Exceeded", result["metrics"])
+
+        if result["exit_code"] != 0:
+            return (False, result["stdout"], result["stderr"], result["metrics"])
+
+        return (True, result["stdout"], "", result["metrics"])
+
+    def shutdown(self):
+        while True:
+            try:
+                self._idle.get_nowait().kill()
+            except queue.Empty:
+                return
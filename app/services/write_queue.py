@@ -0,0 +1,121 @@
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+
+class WriteQueue:
+    """Single writer thread that group-commits write jobs from concurrent requests.
+
+    A job is `fn(session)` that writes through the session without committing. The writer
+    takes every job already waiting (up to `max_batch`), runs them in one transaction and
+    commits once, so concurrent submissions share a commit and SQLite never sees two writers
+    from this process. If a batch fails it is rolled back and its jobs are retried one
+    transaction each, so only the failing job gets the error. Jobs may therefore run twice
+    and must not have side effects outside the session.
+    """
+
+    SIZE_WINDOW = 200
+
+    def __init__(self, session_factory, max_batch: int = 64):
+        self._session_factory = session_factory
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+        self._jobs = 0
+        self._batches = 0
+        self._retried = 0
+        self._failed = 0
+        self._batch_sizes = deque(maxlen=self.SIZE_WINDOW)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._writer_loop, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def submit(self, fn) -> Future:
+        self.start()
+        future = Future()
+        self._queue.put((fn, future))
+        return future
+
+    def run(self, fn):
+        """Run a job through the writer and wait until it is committed; returns the job's result."""
+        return self.submit(fn).result()
+
+    def _writer_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            # Whatever queued up during the previous commit joins this one
+            batch = [item]
+            stop = False
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._run_batch(batch)
+            with self._lock:
+                self._batches += 1
+                self._batch_sizes.append(len(batch))
+            if stop:
+                return
+
+    def _run_batch(self, batch: list):
+        session = self._session_factory()
+        results, error = None, None
+        try:
+            results = [fn(session) for fn, _ in batch]
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            error = e
+        finally:
+            session.close()
+
+        if error is None:
+            with self._lock:
+                self._jobs += len(batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+        elif len(batch) == 1:
+            with self._lock:
+                self._jobs += 1
+                self._failed += 1
+            batch[0][1].set_exception(error)
+        else:
+            with self._lock:
+                self._retried += len(batch)
+            for item in batch:
+                self._run_batch([item])
+
+    def metrics(self) -> dict:
+        with self._lock:
+            sizes = list(self._batch_sizes)
+            return {
+                "jobs": self._jobs,
+                "batches": self._batches,
+                "retried": self._retried,
+                "failed": self._failed,
+                "queued": self._queue.qsize(),
+                "avg_batch_size": round(sum(sizes) / len(sizes), 2) if sizes else None,
+                "max_batch_size": max(sizes) if sizes else None,
+            }
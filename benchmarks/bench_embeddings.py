@@ -0,0 +1,55 @@
+"""Embedding blob decode throughput and on-disk size: pickle vs. the binary formats.
+
+Encodes N random 384-dim vectors in each format, times decoding all of them, and writes
+them into a throwaway SQLite table to measure the resulting database size.
+
+    python -m benchmarks.bench_embeddings --n 100000
+"""
+import argparse
+import os
+import pickle
+import sqlite3
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.embedding_codec import EmbeddingCodec
+
+
+def db_size(blobs: list) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE problems (id INTEGER PRIMARY KEY, embedding BLOB)")
+        conn.executemany("INSERT INTO problems (embedding) VALUES (?)", ((b,) for b in blobs))
+        conn.commit()
+        conn.close()
+        return os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    args = parser.parse_args()
+
+    vectors = np.random.default_rng(0).normal(size=(args.n, args.dim)).astype(np.float32)
+    formats = {"pickle": lambda v: pickle.dumps(v)}
+    formats.update({dtype: (lambda v, d=dtype: EmbeddingCodec.encode(v, d)) for dtype in EmbeddingCodec.DTYPES})
+
+    print(f"{'format':>8} {'decode (vec/s)':>16} {'blob bytes':>11} {'db size (MB)':>13} {'max abs err':>12}")
+    for name, encode in formats.items():
+        blobs = [encode(v) for v in vectors]
+
+        start = time.perf_counter()
+        decoded = [EmbeddingCodec.decode(b) for b in blobs]
+        elapsed = time.perf_counter() - start
+
+        error = float(np.abs(np.stack(decoded) - vectors).max())
+        print(f"{name:>8} {args.n / elapsed:16,.0f} {len(blobs[0]):11} "
+              f"{db_size(blobs) / 2**20:13.1f} {error:12.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Cold-start cost of the server and each CLI command.
+
+Runs every target in a fresh interpreter and reports wall time, peak RSS and which heavy
+ML stacks ended up imported. CLI commands are measured up to `--help`, i.e. the import and
+command-dispatch cost every invocation pays before doing any work.
+
+    python -m benchmarks.bench_import --repeat 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = ["tensorflow", "keras", "sklearn", "sentence_transformers", "torch"]
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "ms": elapsed * 1000,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+CLI_COMMANDS = [
+    "init-db", "embed-problems", "migrate-embeddings", "generate-data", "train-models", "export-models",
+    "init-user-predictions", "recompute-all", "generate-hints", "rebuild-features", "seed-problems",
+]
+
+
+def targets() -> dict:
+    found = {"server (import app.main)": "import app.main"}
+    for command in CLI_COMMANDS:
+        found[f"cli {command}"] = (
+            "from app.cli import cli\n"
+            f"try:\n    cli([{command!r}, '--help'])\nexcept SystemExit:\n    pass"
+        )
+    return found
+
+
+def run(body: str) -> dict:
+    code = PROBE.format(body=body, heavy=HEAVY_MODULES)
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, cwd=os.getcwd()
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per target; the fastest is reported")
+    args = parser.parse_args()
+
+    print(f"{'target':<34} {'import (ms)':>12} {'peak RSS (MB)':>14}  heavy modules loaded")
+    for name, body in targets().items():
+        try:
+            runs = [run(body) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{name:<34} {'failed':>12} {'':>14}  {e}")
+            continue
+        best = min(runs, key=lambda r: r["ms"])
+        print(f"{name:<34} {best['ms']:12.0f} {best['rss_mb']:14.0f}  {', '.join(best['heavy']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Keras vs. NumPy (exported .npz) inference: load time, per-call latency and agreement.
+
+Exports each trained model to a temporary .npz, then times a cold load and `predict` at
+several batch sizes through both engines and reports the largest output difference.
+
+    python -m benchmarks.bench_inference --batches 1 50 5000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from app.config import DIFFICULTY_MODEL_PATH, HINT_TIMING_MODEL_PATH
+from app.services.hint_timing_model import HintTimingModel
+from app.services.numpy_mlp import NumpyMLP
+from app.services.personalized_difficulty_model import PersonalizedDifficultyModel
+
+MODELS = {
+    "difficulty": (PersonalizedDifficultyModel, DIFFICULTY_MODEL_PATH),
+    "hint_timing": (HintTimingModel, HINT_TIMING_MODEL_PATH),
+}
+
+
+def timed(fn, repeat: int = 1) -> tuple:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 50, 5000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (model_cls, model_path) in MODELS.items():
+            keras_load_ms, keras_model = timed(lambda: _load(model_cls, model_path))
+            npz_path = os.path.join(tmp, f"{name}.npz")
+            NumpyMLP.export(keras_model.model, keras_model.scaler, npz_path)
+            numpy_load_ms, numpy_model = timed(lambda: NumpyMLP.load(npz_path))
+
+            n_features = numpy_model.mean.shape[0]
+            print(f"\n{name}: load keras {keras_load_ms:.0f} ms, numpy {numpy_load_ms:.2f} ms")
+            print(f"{'batch':>8} {'keras (ms)':>11} {'numpy (ms)':>11} {'max |diff|':>11}")
+            for batch in args.batches:
+                X = rng.normal(size=(batch, n_features)) * keras_model.scaler.scale_ + keras_model.scaler.mean_
+                keras_ms, keras_out = timed(lambda: keras_model.predict(X), args.repeat)
+                numpy_ms, numpy_out = timed(lambda: numpy_model.predict(X), args.repeat)
+                diff = float(np.abs(keras_out - numpy_out).max())
+                print(f"{batch:>8} {keras_ms:11.2f} {numpy_ms:11.3f} {diff:11.2e}")
+
+
+def _load(model_cls, model_path):
+    model = model_cls(model_path)
+    model.load()
+    return model
+
+
+if __name__ == "__main__":
+    main()
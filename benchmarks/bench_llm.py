@@ -0,0 +1,74 @@
+"""Mentor LLM calls against the local stub: per-request sync clients vs. the shared async client.
+
+"sequential" is the old path: a new Anthropic client per call, hint then explanation. "shared" is
+MentorService today: both calls in flight at once on one pooled client, under LLM_MAX_CONCURRENCY.
+Each submission's latency is the time until both texts are back. The response cache is off
+unless --cache is given (every submission here has the same inputs, so nearly all would hit).
+
+    python -m benchmarks.bench_llm --latency-ms 400 --submissions 64 --threads 8 [--cache]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks import llm_stub_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=400)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--submissions", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=8, help="concurrent requests, like FastAPI's thread pool")
+    parser.add_argument("--cache", action="store_true", help="serve repeated prompts from the LLM response cache")
+    args = parser.parse_args()
+
+    server = llm_stub_server.start(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["LLM_BASE_URL"] = base_url  # read by app.config on import
+    os.environ["LLM_CACHE_ENABLED"] = "1" if args.cache else "0"
+
+    import anthropic
+    from app.config import OPENAI_API_KEY
+    from app.services.llm_client import LLMClient
+    from app.services.mentor_service import MentorService
+
+    def sequential(_):
+        start = time.perf_counter()
+        for max_tokens in (200, 100):
+            client = anthropic.Anthropic(api_key=OPENAI_API_KEY, base_url=base_url)
+            client.messages.create(model=MentorService.MODEL, max_tokens=max_tokens,
+                                   messages=[{"role": "user", "content": "stub"}])
+        return time.perf_counter() - start
+
+    def shared(_):
+        start = time.perf_counter()
+        mentor = MentorService()
+        hint = LLMClient.submit(mentor.generate_hint_async("wrong_answer", "off by one", "Two Sum", "array"))
+        mentor._generate_recommendation_explanation(False, "Two Sum", "A, B, C", "array")
+        hint.result()
+        return time.perf_counter() - start
+
+    print(f"stub latency {args.latency_ms:.0f} ms, {args.submissions} submissions, {args.threads} threads")
+    print(f"{'path':>12} {'mean (ms)':>10} {'p95 (ms)':>10} {'subs/s':>8}")
+    for name, fn in (("sequential", sequential), ("shared", shared)):
+        fn(0)  # warm-up: imports, first connection
+        with ThreadPoolExecutor(args.threads) as pool:
+            start = time.perf_counter()
+            latencies = np.array(list(pool.map(fn, range(args.submissions)))) * 1000
+            elapsed = time.perf_counter() - start
+        print(f"{name:>12} {latencies.mean():10.0f} {np.percentile(latencies, 95):10.0f} "
+              f"{args.submissions / elapsed:8.1f}")
+    print("llm client:", LLMClient.stats())
+    if args.cache:
+        print("hint cache:", MentorService.hint_cache.stats())
+
+    LLMClient.shutdown()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
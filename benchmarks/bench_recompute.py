@@ -0,0 +1,83 @@
+"""Per-user prediction recompute time vs. catalog size.
+
+Compares the cached problem feature matrix + single model call used by
+`_recompute_all_predictions`, the same batch built from Problem rows, and the old
+one-`predict`-per-problem loop.
+
+    python -m benchmarks.bench_recompute --sizes 50 500 5000 50000
+"""
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.routes import _create_difficulty_features, _create_difficulty_feature_matrix
+from app.services.feature_store import ALL_TAGS
+from app.services.model_registry import ModelRegistry
+from app.services.problem_features import ProblemFeatureCache
+
+
+def make_problems(n: int) -> list:
+    rng = random.Random(42)
+    return [
+        SimpleNamespace(
+            id=i,
+            tags=",".join(rng.sample(ALL_TAGS, rng.randint(1, 3))),
+            difficulty=rng.choice(["easy", "medium", "hard"]),
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def bench_batched(model, profile, problems) -> float:
+    start = time.perf_counter()
+    features = _create_difficulty_feature_matrix(profile, problems)
+    model.predict(features)[:, 0].tolist()
+    return time.perf_counter() - start
+
+
+def bench_cached(model, profile, problem_matrix) -> float:
+    start = time.perf_counter()
+    features = _create_difficulty_feature_matrix(profile, problem_matrix)
+    model.predict(features)[:, 0].tolist()
+    return time.perf_counter() - start
+
+
+def bench_per_problem(model, profile, problems) -> float:
+    start = time.perf_counter()
+    for problem in problems:
+        features = _create_difficulty_features(profile, problem)
+        float(model.predict(features.reshape(1, -1))[0][0])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000, 50000])
+    parser.add_argument("--max-per-problem", type=int, default=500,
+                        help="Largest catalog to also time with the per-problem loop")
+    args = parser.parse_args()
+
+    model = ModelRegistry.get("difficulty")
+    profile = SimpleNamespace(avg_time_per_solve=120.0, avg_edits=4.0)
+
+    # Warm up graph tracing so the first size isn't penalised
+    bench_batched(model, profile, make_problems(10))
+
+    print(f"{'problems':>10} {'cached (ms)':>12} {'batched (ms)':>14} {'per-problem (ms)':>18}")
+    for n in args.sizes:
+        problems = make_problems(n)
+        problem_matrix = np.array([ProblemFeatureCache.problem_vector(p.tags, p.difficulty) for p in problems])
+        cached = bench_cached(model, profile, problem_matrix) * 1000
+        batched = bench_batched(model, profile, problems) * 1000
+        if n <= args.max_per_problem:
+            per_problem = f"{bench_per_problem(model, profile, problems) * 1000:18.1f}"
+        else:
+            per_problem = f"{'-':>18}"
+        print(f"{n:>10} {cached:12.1f} {batched:14.1f} {per_problem}")
+
+
+if __name__ == "__main__":
+    main()
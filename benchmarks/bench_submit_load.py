@@ -0,0 +1,138 @@
+"""Concurrent submit_solution load: SQLite defaults vs. the tuned database layer.
+
+Each mode runs in a fresh process against its own copy of app/data/problems.db:
+"before" uses SQLite's defaults (rollback journal, synchronous=FULL) and commits each write
+in the request thread; "after" uses WAL + pragmas and the group-commit writer. Both use the
+same connection pool. LLM calls go to the local stub and verdicts are cached, so the
+database work dominates.
+
+    python -m benchmarks.bench_submit_load --threads 16 --submissions 400
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    "before": {"SQLITE_PRAGMAS": "0", "GROUP_COMMIT": "0"},
+    "after": {"SQLITE_PRAGMAS": "1", "GROUP_COMMIT": "1"},
+}
+
+
+def run_worker(threads: int, submissions: int):
+    from concurrent.futures import ThreadPoolExecutor
+
+    import numpy as np
+    from fastapi import HTTPException
+
+    from benchmarks import llm_stub_server
+    server = llm_stub_server.start(latency_ms=0)
+    os.environ["LLM_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+
+    from app.database import SessionLocal, create_schema
+    create_schema()
+    from app import routes
+    from app.models import Problem, User
+    from app.schemas import SubmissionRequest
+
+    db = SessionLocal()
+    problem = db.query(Problem).filter(Problem.tests.any(), Problem.correct_solution.isnot(None)).first()
+    user_ids = [uid for (uid,) in db.query(User.id).order_by(User.id).limit(submissions)]
+    db.close()
+    codes = [problem.correct_solution, "print(0)", "print(1 // 0)"]
+
+    def submit(i):
+        request = SubmissionRequest(user_id=user_ids[i % len(user_ids)], problem_id=problem.id,
+                                    code=codes[i % len(codes)], time_spent_seconds=600)
+        session = SessionLocal()
+        start = time.perf_counter()
+        try:
+            routes.submit_solution(request, db=session)
+            error = None
+        except HTTPException as e:
+            error = e.detail
+        finally:
+            session.close()
+        return time.perf_counter() - start, error
+
+    for i in range(len(codes)):
+        submit(i)  # warm-up: models, judge workers, verdict cache
+
+    with ThreadPoolExecutor(threads) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(submit, range(submissions)))
+        elapsed = time.perf_counter() - start
+
+    latencies = np.array([r[0] for r in results]) * 1000
+    errors = [r[1] for r in results if r[1]]
+    print(json.dumps({
+        "throughput": submissions / elapsed,
+        "p50": float(np.percentile(latencies, 50)),
+        "p95": float(np.percentile(latencies, 95)),
+        "p99": float(np.percentile(latencies, 99)),
+        "errors": len(errors),
+        "locked": sum("locked" in str(e) for e in errors),
+        "write_queue": routes.write_queue.metrics(),
+    }))
+    routes.recompute_queue.stop()
+    routes.write_queue.stop()
+    os._exit(0)  # skip interpreter teardown of judge workers and model threads
+
+
+def run_mode(name: str, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, "app", "data"))
+        # A consistent copy, back on the rollback journal so "before" really starts from the defaults
+        src = sqlite3.connect("app/data/problems.db")
+        dst = sqlite3.connect(os.path.join(tmp, "app", "data", "problems.db"))
+        src.backup(dst)
+        dst.execute("PRAGMA journal_mode=DELETE")
+        src.close()
+        dst.close()
+        os.symlink(os.path.abspath("app/data/models"), os.path.join(tmp, "app", "data", "models"))
+        shutil.copytree("app/data/training", os.path.join(tmp, "app", "data", "training"), dirs_exist_ok=True)
+
+        env = {**os.environ, **MODES[name], "PYTHONPATH": ROOT}
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_submit_load", "--worker",
+             "--threads", str(args.threads), "--submissions", str(args.submissions)],
+            cwd=tmp, env=env, capture_output=True, text=True, timeout=args.timeout,
+        )
+        lines = [line for line in out.stdout.splitlines() if line.startswith("{")]
+        if out.returncode != 0 or not lines:
+            raise RuntimeError(f"{name} run failed:\n{out.stderr[-2000:]}")
+        return json.loads(lines[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--submissions", type=int, default=400)
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--timeout", type=int, default=1800)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.threads, args.submissions)
+        return
+
+    print(f"{args.submissions} submissions on {args.threads} threads")
+    print(f"{'mode':>8} {'subs/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'errors':>7} {'locked':>7}"
+          f" {'avg batch':>10}")
+    for name in args.modes:
+        r = run_mode(name, args)
+        batch = r["write_queue"]["avg_batch_size"] or "-"
+        print(f"{name:>8} {r['throughput']:8.1f} {r['p50']:9.0f} {r['p95']:9.0f} {r['p99']:9.0f}"
+              f" {r['errors']:7d} {r['locked']:7d} {batch:>10}")
+
+
+if __name__ == "__main__":
+    main()
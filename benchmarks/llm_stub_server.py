@@ -0,0 +1,77 @@
+"""Local stand-in for the Anthropic Messages API, for offline latency/throughput runs.
+
+Answers every POST /v1/messages after a fixed (optionally jittered) delay with a reply that
+parses as both a hint and a recommendation explanation. Point the app at it with
+
+    python -m benchmarks.llm_stub_server --port 8787 --latency-ms 400
+    LLM_BASE_URL=http://127.0.0.1:8787 uvicorn app.main:app
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = json.dumps({
+    "hint": "Trace a small input by hand and check the loop boundaries.",
+    "explanation": "These problems practice the same techniques at a slightly higher difficulty.",
+})
+
+
+def make_handler(latency_ms: float, jitter_ms: float):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so client connection pooling is exercised
+
+        def do_POST(self):
+            length = int(self.headers.get("content-length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            time.sleep(max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000)
+
+            body = json.dumps({
+                "id": "msg_stub",
+                "type": "message",
+                "role": "assistant",
+                "model": request.get("model", "stub"),
+                "content": [{"type": "text", "text": REPLY}],
+                "stop_reason": "end_turn",
+                "stop_sequence": None,
+                "usage": {"input_tokens": 0, "output_tokens": 0},
+            }).encode()
+            self.send_response(200)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return StubHandler
+
+
+def start(port: int = 0, latency_ms: float = 400, jitter_ms: float = 0) -> ThreadingHTTPServer:
+    """Serve on a daemon thread; returns the server (its port is `server.server_address[1]`)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency_ms, jitter_ms))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="llm-stub", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency-ms", type=float, default=400)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.latency_ms, args.jitter_ms))
+    print(f"LLM stub on http://127.0.0.1:{args.port} ({args.latency_ms:.0f} ms per call)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
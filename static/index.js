@@ -33,36 +33,13 @@ function titleCase(s) {
   return s.split("-").map(x => x[0].toUpperCase() + x.slice(1)).join(" ");
 }
 
-function matchesFilter(p) {
-  if (activeFilter === "all") return true;
-  return p.tags.includes(activeFilter);
-}
-
-function matchesDifficulty(p) {
-  if (activeDifficulty === "all") return true;
-  return p.diff === activeDifficulty;
-}
-
-function matchesQuery(p) {
-  if (!query.trim()) return true;
-  const q = query.toLowerCase();
-  return (
-    p.title.toLowerCase().includes(q) ||
-    p.tags.some(t => t.includes(q)) ||
-    String(p.id) === q
-  );
-}
-
 /* =====================
    RENDER
 ===================== */
 
+// items already match the filters: the server applies them to every page
 function render() {
-  const filtered = items.filter(
-    p => matchesFilter(p) && matchesDifficulty(p) && matchesQuery(p)
-  );
-
-  problemBody.innerHTML = filtered.map(p => {
+  problemBody.innerHTML = items.map(p => {
     const tagHtml = p.tags
       .map(t => `<span class="tag">${titleCase(t)}</span>`)
       .join("");
@@ -99,33 +76,109 @@ function render() {
    FETCH DATA
 ===================== */
 
-fetch(`${API_BASE}/api/user/1/difficulty-predictions`)
-  .then(res => res.json())
-  .then(data => {
-    console.log("Fetched predictions:", data);
-    items = data.problems.map(p => ({
-      id: p.id,
-      title: p.title,
-      diff: p.difficulty,
-      tags: p.tags.split(",").map(t => t.trim()),
-      acc: Math.round(p.pass_probability * 100) + "%",
-      status: p.pass_probability >= 0.99 ? "solved" : "todo"
-    }));
-
-    totalEl.textContent = `${items.length} total problems`;
-    const solvedCount = items.filter(i => i.status === "solved").length;
-    solvedEl.textContent = `${solvedCount} solved`;
-    render();
-  })
-  .catch(err => console.error("Failed to fetch predictions:", err));
+// One page at a time: the next page loads when the end of the list scrolls into view
+// (or on "Load more"); the browser revalidates each page by ETag (304 when unchanged).
+// Tag, difficulty and search are applied by the server, so they cover the whole catalog.
+const PREDICTIONS_URL = `${API_BASE}/api/user/1/difficulty-predictions`;
+const PAGE_SIZE = 100;
+const loadMoreBtn = document.getElementById("loadMoreBtn");
+let nextCursor = null;
+let loading = false;
+let generation = 0;  // bumped when the filters change; responses for older filters are dropped
+
+function filterParams() {
+  const params = new URLSearchParams();
+  if (activeFilter !== "all") params.set("tag", activeFilter);
+  if (activeDifficulty !== "all") params.set("difficulty", activeDifficulty);
+  if (query.trim()) params.set("q", query.trim());
+  return params;
+}
+
+function loadPredictions(cursor) {
+  const params = filterParams();
+  params.set("limit", String(PAGE_SIZE));
+  if (cursor) params.set("cursor", cursor);
+
+  const requestGeneration = generation;
+  loading = true;
+  loadMoreBtn.disabled = true;
+  return fetch(`${PREDICTIONS_URL}?${params}`)
+    .then(res => res.json())
+    .then(data => {
+      if (requestGeneration !== generation) return;
+      console.log("Fetched predictions:", data);
+      items = items.concat(data.problems.map(p => ({
+        id: p.id,
+        title: p.title,
+        diff: p.difficulty,
+        tags: p.tags.split(",").map(t => t.trim()),
+        acc: Math.round(p.pass_probability * 100) + "%",
+        status: p.pass_probability >= 0.99 ? "solved" : "todo"
+      })));
+      render();
+
+      nextCursor = data.next_cursor;
+      loadMoreBtn.style.display = nextCursor ? "" : "none";
+    })
+    .finally(() => {
+      if (requestGeneration !== generation) return;
+      loading = false;
+      loadMoreBtn.disabled = false;
+    });
+}
+
+function loadNextPage() {
+  if (loading || !nextCursor) return;
+  loadPredictions(nextCursor)
+    .catch(err => console.error("Failed to fetch predictions:", err));
+}
+
+// Start over from the first page, e.g. after a filter change
+function reloadPredictions() {
+  generation++;
+  items = [];
+  nextCursor = null;
+  loadMoreBtn.style.display = "none";
+  render();
+  loadPredictions(null)
+    .catch(err => console.error("Failed to fetch predictions:", err));
+}
+
+// Catalog-wide counts: a one-row page asking for its total
+function countPredictions(extra) {
+  const params = new URLSearchParams({ limit: "1", include_total: "true", ...extra });
+  return fetch(`${PREDICTIONS_URL}?${params}`)
+    .then(res => res.json())
+    .then(data => data.total);
+}
+
+function loadStats() {
+  return Promise.all([countPredictions({}), countPredictions({ min_probability: "0.99" })])
+    .then(([total, solved]) => {
+      totalEl.textContent = `${total} total problems`;
+      solvedEl.textContent = `${solved} solved`;
+    });
+}
+
+loadMoreBtn.addEventListener("click", loadNextPage);
+new IntersectionObserver(entries => {
+  if (entries.some(e => e.isIntersecting)) loadNextPage();
+}, { rootMargin: "200px" }).observe(loadMoreBtn);
+
+reloadPredictions();
+loadStats()
+  .catch(err => console.error("Failed to fetch stats:", err));
 
 /* =====================
    EVENTS
 ===================== */
 
+let searchTimer = null;
 searchInput.addEventListener("input", e => {
   query = e.target.value;
-  render();
+  // Wait for a pause in typing before asking the server
+  clearTimeout(searchTimer);
+  searchTimer = setTimeout(reloadPredictions, 250);
 });
 
 chips.addEventListener("click", e => {
@@ -136,7 +189,7 @@ chips.addEventListener("click", e => {
   btn.classList.add("active");
 
   activeFilter = btn.dataset.filter;
-  render();
+  reloadPredictions();
 });
 
 diffChips.addEventListener("click", e => {
@@ -147,7 +200,7 @@ diffChips.addEventListener("click", e => {
   btn.classList.add("active");
 
   activeDifficulty = btn.dataset.diff;
-  render();
+  reloadPredictions();
 });
 
 shuffleBtn.addEventListener("click", () => {
@@ -159,6 +212,7 @@ shuffleBtn.addEventListener("click", () => {
 });
 
 resetBtn.addEventListener("click", () => {
+  clearTimeout(searchTimer);
   query = "";
   activeFilter = "all";
   activeDifficulty = "all";
@@ -168,7 +222,7 @@ resetBtn.addEventListener("click", () => {
   document.querySelector('.chip[data-filter="all"]').classList.add("active");
   document.querySelector('#difficultyChips .chip[data-diff="all"]').classList.add("active");
 
-  render();
+  reloadPredictions();
 });
 
 toggleThemeBtn.addEventListener("click", () => {
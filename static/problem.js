@@ -158,12 +158,93 @@ document.addEventListener("DOMContentLoaded", async () => {
     alert("Run clicked (demo)")
   );
 
+  const testcasesEl = document.querySelector(".testcases");
+
+  function renderTestProgress(total, tests) {
+    if (!testcasesEl) return;
+
+    const labels = {
+      pending: "…",
+      passed: "✓ Passed",
+      cancelled: "Skipped",
+      wrong_answer: "✗ Wrong Answer",
+      runtime: "✗ Runtime Error",
+      tle: "✗ Time Limit",
+      mle: "✗ Memory Limit",
+    };
+
+    const rows = [];
+    for (let i = 0; i < total; i++) {
+      const t = tests[i] || { status: "pending" };
+      const usage = t.cpu_time_ms != null
+        ? `${Math.round(t.cpu_time_ms)} ms · ${(t.max_rss_kb / 1024).toFixed(1)} MB`
+        : "";
+      rows.push(
+        `<div class="tc-progress ${t.status}"><span>Test ${i + 1}</span><span>${usage}</span><span>${labels[t.status] || t.status}</span></div>`
+      );
+    }
+
+    testcasesEl.innerHTML = `<h4>Judging</h4>${rows.join("")}`;
+  }
+
+  // Follow an async submission over Server-Sent Events, falling back to polling
+  function followSubmission(jobId) {
+    return new Promise((resolve, reject) => {
+      let total = 0;
+      const tests = {};
+
+      function poll() {
+        fetch(`${API_BASE}/api/mentor/submissions/${jobId}`)
+          .then(res => res.json())
+          .then(job => {
+            total = job.total_tests || total;
+            job.tests.forEach(t => { tests[t.index] = t; });
+            renderTestProgress(total, tests);
+
+            if (job.status === "done") resolve(job.result);
+            else if (job.status === "failed") reject(new Error(job.error));
+            else setTimeout(poll, 500);
+          })
+          .catch(reject);
+      }
+
+      if (!window.EventSource) {
+        poll();
+        return;
+      }
+
+      const source = new EventSource(`${API_BASE}/api/mentor/submissions/${jobId}/events`);
+
+      source.addEventListener("judging", e => {
+        total = JSON.parse(e.data).total_tests;
+        renderTestProgress(total, tests);
+      });
+
+      source.addEventListener("test", e => {
+        const t = JSON.parse(e.data);
+        tests[t.index] = t;
+        renderTestProgress(total, tests);
+      });
+
+      source.addEventListener("result", e => {
+        source.close();
+        resolve(JSON.parse(e.data));
+      });
+
+      source.addEventListener("error", e => {
+        source.close();
+        if (e.data) reject(new Error(JSON.parse(e.data).detail));
+        else poll();
+      });
+    });
+  }
+
   document.querySelector(".btn.primary")?.addEventListener("click", async () => {
     const code = document.querySelector(".code-editor").value;
     const language = document.querySelector(".lang-pill").value;
 
     try {
-      const res = await fetch(`${API_BASE}/api/mentor/submit/`, {
+      const res = await fetch(`${API_BASE}/api/mentor/submit/async`, {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -182,7 +263,8 @@ document.addEventListener("DOMContentLoaded", async () => {
         return;
       }
 
-      const result = await res.json();
+      const job = await res.json();
+      const result = await followSubmission(job.job_id);
       console.log("Full response:", result);
       showVerdict(result);
     } catch (err) {
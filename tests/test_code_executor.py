@@ -0,0 +1,96 @@
+"""The warm worker pool against the spawn executor: same verdicts, and a pool that can't get stuck."""
+import pytest
+
+import app.services.code_executor as code_executor
+import app.services.worker_pool as worker_pool
+from app.services.code_executor import CodeExecutor
+from app.services.worker_pool import JUDGE_ERROR, OUTPUT_LIMIT_EXCEEDED, WarmWorkerPool
+
+PROGRAMS = {
+    "stdin": ("import sys\nprint(sys.stdin.read().upper())", "hello\nworld"),
+    "buffer": ("import sys\nsys.stdout.buffer.write(b'raw bytes\\n')", ""),
+    "os_write": ("import os\nos.write(1, b'fd one\\n')\nos.write(2, b'fd two\\n')\nraise SystemExit(2)", ""),
+    "exit_message": ("import sys\nprint('partial')\nsys.exit('bad input')", ""),
+    "traceback": ("def f(x):\n    return 1 / x\n\nprint(f(0))", ""),
+    "memory": ("x = bytearray(10 ** 10)", ""),
+    "fork": ("import os\npid = os.fork()\nif pid: os.waitpid(pid, 0)\nprint('done')", ""),
+    "output_flood": ("while True:\n    print('x' * 10 ** 6)", ""),
+}
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = WarmWorkerPool(size=2, max_runs=50, limits=CodeExecutor.resource_limits())
+    yield pool
+    pool.shutdown()
+
+
+@pytest.mark.parametrize("name", sorted(PROGRAMS))
+def test_warm_matches_spawn(pool, name):
+    code, stdin = PROGRAMS[name]
+    warm = pool.run(code, stdin, CodeExecutor.TIMEOUT)
+    spawn = CodeExecutor._execute_spawn(code, stdin)
+    assert warm[:3] == spawn[:3]
+    assert JUDGE_ERROR not in warm[2]
+
+
+def test_runs_do_not_share_interpreter_state():
+    pool = WarmWorkerPool(size=1, limits=CodeExecutor.resource_limits())
+    try:
+        pool.run("import json, builtins\njson.marker = 1\nbuiltins.len = None", "", CodeExecutor.TIMEOUT)
+        assert pool.run("import json\nprint(hasattr(json, 'marker'), len('ab'))", "", CodeExecutor.TIMEOUT)[:2] == \
+            (True, "False 2\n")
+    finally:
+        pool.shutdown()
+
+
+def test_worker_survives_a_failed_run():
+    worker = worker_pool._Worker(CodeExecutor.resource_limits())
+    try:
+        worker.send("print(1)", None)  # the worker can't run this; it must answer, not exit
+        assert "error" in worker.recv()
+        worker.send("print(1)", "")
+        assert worker.recv()["stdout"] == "1\n"
+    finally:
+        worker.kill()
+
+
+def test_run_gives_up_without_idle_workers(monkeypatch):
+    monkeypatch.setattr(WarmWorkerPool, "ACQUIRE_TIMEOUT", 0.1)
+    pool = WarmWorkerPool(size=0)
+    success, _, error, _ = pool.run("print(1)", "", CodeExecutor.TIMEOUT)
+    assert not success and error.startswith(JUDGE_ERROR)
+
+
+def test_replace_retries_until_a_worker_starts(monkeypatch):
+    attempts = []
+
+    class FlakyWorker:
+        def __init__(self, limits):
+            attempts.append(limits)
+            if len(attempts) < 3:
+                raise BlockingIOError(11, "Resource temporarily unavailable")
+
+        def kill(self):
+            pass
+
+    monkeypatch.setattr(worker_pool, "_Worker", FlakyWorker)
+    monkeypatch.setattr(WarmWorkerPool, "REPLACE_RETRY_MAX_DELAY", 0.01)
+    pool = WarmWorkerPool(size=0)
+    pool._replace(FlakyWorker.__new__(FlakyWorker))
+    assert len(attempts) == 3
+    assert isinstance(pool._idle.get_nowait(), FlakyWorker)
+
+
+def test_output_flood_is_a_failure():
+    status, analysis, _ = CodeExecutor.judge("while True:\n    print('x' * 10 ** 6)", [("", "1")], parallel=False)
+    assert (status, analysis) == ("wrong_answer", f"Output limit exceeded ({code_executor.JUDGE_MAX_OUTPUT_KB} KB)")
+
+
+def test_plain_judge_without_sandbox_support(monkeypatch):
+    monkeypatch.setattr(code_executor, "SANDBOX_SUPPORTED", False)
+    monkeypatch.setattr(CodeExecutor, "TIMEOUT", 1)
+    assert CodeExecutor.execute_code("print(input()[::-1])", "abc")[:3] == (True, "cba\n", "")
+    assert CodeExecutor.execute_code("while True: pass", "")[2] == "Time Limit Exceeded"
+    assert CodeExecutor.execute_code("print('x' * 10 ** 7)", "")[2] == OUTPUT_LIMIT_EXCEEDED
+    assert CodeExecutor.judge("print(1)\nraise SystemExit(1)", [("", "1")], parallel=False)[0] == "runtime"
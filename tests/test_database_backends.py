@@ -0,0 +1,285 @@
+"""Schema migrations, upsert_insert writes and predictions paging, run on SQLite and on Postgres (see conftest)."""
+from datetime import datetime
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import inspect, text
+
+import app.database as database
+from app import routes
+from app.migrations import MIGRATIONS
+from app.models import (HintLibraryEntry, PersonalizedDifficultyPrediction, PredictionRefreshState, Problem,
+                        Submission, User, UserProfile, UserTagStats)
+from app.schemas import SubmissionRequest
+from app.services.hint_library import HintLibrary
+from app.services.model_registry import ModelRegistry
+
+ALL_VERSIONS = [version for version, _, _ in MIGRATIONS]
+MIGRATION_INDEXES = {
+    "personalized_difficulty_predictions": {"uq_prediction_user_problem", "ix_prediction_user_probability"},
+    "submissions": {"ix_submission_user_problem"},
+    "problem_tests": {"ix_problem_test_problem"},
+    "problems": {"ix_problems_features_updated_at", "ix_problems_updated_at"},
+}
+TAGS = ["array", "dp", "graph", "greedy", "math", "string"]
+
+
+def _index_names(engine, table: str) -> set:
+    return {index["name"] for index in inspect(engine).get_indexes(table)}
+
+
+def _seed(db, n_users: int = 3, n_problems: int = 12):
+    now = datetime.now().isoformat()
+    users = [User(username=f"user{i}", created_at=now) for i in range(n_users)]
+    problems = [
+        Problem(title=f"Problem {i}", difficulty=("easy", "medium", "hard")[i % 3],
+                tags=f"{TAGS[i % len(TAGS)]}, {TAGS[(i + 2) % len(TAGS)]}")
+        for i in range(n_problems)
+    ]
+    db.add_all(users + problems)
+    db.commit()
+    return [u.id for u in users], [p.id for p in problems]
+
+
+def _predictions(db, user_id: int) -> dict:
+    P = PersonalizedDifficultyPrediction
+    return dict(db.query(P.problem_id, P.pass_probability).filter(P.user_id == user_id).all())
+
+
+class _FakeDifficultyModel:
+    """Deterministic stand-in for the Keras difficulty model: a fixed logistic over the 15 features."""
+
+    def __init__(self, seed: int):
+        self.weights = np.random.default_rng(seed).normal(size=15)
+
+    def predict(self, features):
+        return (1.0 / (1.0 + np.exp(-np.sum(features * self.weights, axis=1))))[:, None]
+
+
+@pytest.fixture
+def difficulty_model(monkeypatch):
+    models = {"difficulty": _FakeDifficultyModel(seed=1)}
+    monkeypatch.setattr(ModelRegistry, "get", classmethod(lambda cls, name: models[name]))
+    monkeypatch.setattr(ModelRegistry, "version", classmethod(lambda cls, name: "test"))
+    return models
+
+
+# ---- migrations ----
+
+def test_create_schema_on_empty_database(engine):
+    assert database.create_schema() == ALL_VERSIONS
+    assert database.create_schema() == []
+
+    with engine.connect() as conn:
+        assert sorted(conn.execute(text("SELECT version FROM schema_version")).scalars()) == ALL_VERSIONS
+    for table, names in MIGRATION_INDEXES.items():
+        assert names <= _index_names(engine, table)
+
+
+def test_create_schema_on_pre_versioning_database(engine):
+    # Tables as an older release left them: no schema_version, no migration columns or indexes
+    database.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE schema_version"))
+        for names in MIGRATION_INDEXES.values():
+            for name in names:
+                conn.execute(text(f"DROP INDEX {name}"))
+        conn.execute(text("ALTER TABLE problems DROP COLUMN features_updated_at"))
+        conn.execute(text("ALTER TABLE problems DROP COLUMN embedding_text_hash"))
+        conn.execute(text("ALTER TABLE problems DROP COLUMN updated_at"))
+        conn.execute(text("INSERT INTO users (id, username) VALUES (1, 'old')"))
+        conn.execute(text("INSERT INTO problems (id, title, difficulty, tags) VALUES (1, 'A', 'easy', 'dp'), "
+                          "(2, 'B', 'hard', 'graph')"))
+        # Duplicates the unique index used to allow
+        conn.execute(text("INSERT INTO personalized_difficulty_predictions (id, user_id, problem_id, "
+                          "pass_probability) VALUES (1, 1, 1, 0.2), (2, 1, 1, 0.7), (3, 1, 2, 0.4)"))
+
+    assert database.create_schema() == ALL_VERSIONS
+    assert database.create_schema() == []
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, problem_id, pass_probability FROM personalized_difficulty_predictions "
+                                 "ORDER BY id")).all()
+        assert [tuple(r) for r in rows] == [(2, 1, 0.7), (3, 2, 0.4)]  # the newest duplicate is kept
+        assert conn.execute(text("SELECT COUNT(*) FROM problems WHERE features_updated_at IS NULL "
+                                 "OR updated_at IS NULL")).scalar() == 0
+    assert {"embedding_text_hash", "features_updated_at", "updated_at"} <= \
+        {c["name"] for c in inspect(engine).get_columns("problems")}
+    for table, names in MIGRATION_INDEXES.items():
+        assert names <= _index_names(engine, table)
+
+
+def test_create_schema_skips_recorded_versions(engine):
+    database.create_schema()
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM schema_version WHERE version >= 4"))
+
+    # Steps are idempotent, so a partly recorded database just records the rest
+    assert database.create_schema() == [v for v in ALL_VERSIONS if v >= 4]
+
+
+# ---- upsert_insert writers ----
+
+def test_upsert_predictions_inserts_then_updates(db):
+    (user_id,), problem_ids = _seed(db, n_users=1, n_problems=4)
+
+    written = routes._upsert_predictions(db, user_id, {pid: 0.5 for pid in problem_ids})
+    db.commit()
+    assert written == 4
+
+    # Unchanged and within-threshold rows are skipped; the rest update in place
+    changes = {problem_ids[0]: 0.5, problem_ids[1]: 0.52, problem_ids[2]: 0.9}
+    written = routes._upsert_predictions(db, user_id, changes, threshold=0.05)
+    db.commit()
+    assert written == 1
+    assert _predictions(db, user_id) == {problem_ids[0]: 0.5, problem_ids[1]: 0.5, problem_ids[2]: 0.9,
+                                         problem_ids[3]: 0.5}
+    assert db.query(PersonalizedDifficultyPrediction).count() == 4
+
+
+def test_recompute_bulk_matches_single_user_path(db, difficulty_model, monkeypatch):
+    user_ids, problem_ids = _seed(db)
+    solved_id = problem_ids[3]
+    request = SubmissionRequest(user_id=user_ids[0], problem_id=solved_id, code="print(1)", time_spent_seconds=60)
+    routes._record_submission(db, request, user_ids[0], solved_id, "dp, math", "accepted", None, False)
+    db.commit()
+
+    routes._recompute_predictions_bulk(user_ids, db)
+    first = {uid: _predictions(db, uid) for uid in user_ids}
+    assert solved_id not in first[user_ids[0]]  # solved problems aren't scored
+    assert db.query(PredictionRefreshState).count() == len(user_ids)
+
+    # A stale prediction on a solved problem is re-pinned, and new scores overwrite the old rows
+    routes._upsert_predictions(db, user_ids[0], {solved_id: 0.3})
+    db.commit()
+    difficulty_model["difficulty"] = _FakeDifficultyModel(seed=2)
+    monkeypatch.setattr(routes, "BULK_WRITE_ROWS", 5)  # several streamed chunks per group
+    routes._recompute_predictions_bulk(user_ids, db)
+    bulk = {uid: _predictions(db, uid) for uid in user_ids}
+    assert bulk[user_ids[0]][solved_id] == 1.0
+    assert bulk != first
+    assert db.query(PersonalizedDifficultyPrediction).count() == len(user_ids) * len(problem_ids)
+    assert db.query(PredictionRefreshState).count() == len(user_ids)
+
+    for uid in user_ids:
+        counts = routes._recompute_all_predictions(uid, db)
+        assert counts["written"] == 0  # the single-user path finds nothing to change
+        assert _predictions(db, uid) == bulk[uid]
+
+
+def test_record_submission_upserts_profile_and_tag_stats(db):
+    (user_id,), (problem_id, *_) = _seed(db, n_users=1, n_problems=1)
+    request = SubmissionRequest(user_id=user_id, problem_id=problem_id, code="print(1)", time_spent_seconds=90)
+
+    for status in ("wrong_answer", "accepted"):
+        routes._record_submission(db, request, user_id, problem_id, "dp, math", status, None, False)
+        db.commit()
+
+    profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).one()
+    assert (profile.total_attempts, profile.total_solved, profile.avg_time_per_solve) == (2, 1, 90.0)
+    assert db.query(UserTagStats).filter(UserTagStats.user_id == user_id).count() == 1
+    assert db.query(Submission).filter(Submission.user_id == user_id).count() == 2
+
+
+def test_hint_library_store_upserts(db):
+    _, (problem_id, *_) = _seed(db, n_users=0, n_problems=1)
+
+    HintLibrary.store(db, [{"problem_id": problem_id, "failure_class": "off_by_one", "hint": "old", "inputs_hash": "a"},
+                           {"problem_id": problem_id, "failure_class": "tle", "hint": "faster", "inputs_hash": "a"}])
+    HintLibrary.store(db, [{"problem_id": problem_id, "failure_class": "off_by_one", "hint": "new", "inputs_hash": "b"}])
+
+    hints = {(e.failure_class, e.hint, e.inputs_hash) for e in db.query(HintLibraryEntry)}
+    assert hints == {("off_by_one", "new", "b"), ("tle", "faster", "a")}
+
+
+# ---- predictions paging ----
+
+@pytest.fixture
+def client(db):
+    api = FastAPI()
+    api.include_router(routes.router)
+    return TestClient(api)
+
+
+@pytest.fixture
+def predictions(db):
+    """One user with 25 predictions, with ties, in the endpoint's order: probability desc, then problem id desc."""
+    (user_id,), problem_ids = _seed(db, n_users=1, n_problems=25)
+    probs = {pid: round(0.1 + 0.1 * (i % 8), 1) for i, pid in enumerate(problem_ids)}
+    routes._upsert_predictions(db, user_id, probs)
+    db.commit()
+    order = sorted(probs, key=lambda pid: (probs[pid], pid), reverse=True)
+    return user_id, order
+
+
+def test_predictions_cursor_pages(client, predictions):
+    user_id, order = predictions
+    url = f"/api/user/{user_id}/difficulty-predictions"
+
+    first = client.get(url, params={"limit": 10}).json()
+    assert first["total"] == 25
+    seen, cursor = [p["id"] for p in first["problems"]], first["next_cursor"]
+    while cursor:
+        page = client.get(url, params={"limit": 10, "cursor": cursor}).json()
+        assert page["total"] is None  # counted on the first page only
+        seen += [p["id"] for p in page["problems"]]
+        cursor = page["next_cursor"]
+    assert seen == order
+
+    with_total = client.get(url, params={"limit": 10, "cursor": first["next_cursor"], "include_total": True}).json()
+    assert with_total["total"] == 25
+    by_offset = client.get(url, params={"limit": 10, "offset": 10}).json()
+    assert [p["id"] for p in by_offset["problems"]] == order[10:20]
+
+    assert client.get(url, params={"cursor": first["next_cursor"], "offset": 10}).status_code == 400
+    assert client.get(url, params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_predictions_filters(client, predictions, db):
+    user_id, _ = predictions
+    url = f"/api/user/{user_id}/difficulty-predictions"
+
+    page = client.get(url, params={"tag": "dp", "difficulty": "easy", "min_probability": 0.2, "limit": 100}).json()
+    problems = {p.id: p for p in db.query(Problem)}
+    expected = {pid for pid, prob in _predictions(db, user_id).items()
+                if "dp" in [t.strip() for t in problems[pid].tags.split(",")]
+                and problems[pid].difficulty == "easy" and prob >= 0.2}
+    assert {p["id"] for p in page["problems"]} == expected
+    assert page["total"] == len(expected)
+
+    target = problems[max(problems)]
+    by_id = client.get(url, params={"q": str(target.id), "limit": 100}).json()["problems"]
+    assert target.id in {p["id"] for p in by_id}
+    by_title = client.get(url, params={"q": target.title.upper(), "limit": 100}).json()["problems"]
+    assert {p["id"] for p in by_title} == {pid for pid, p in problems.items() if target.title in p.title}
+    assert client.get(url, params={"q": "%", "limit": 100}).json()["problems"] == []
+
+
+def test_predictions_etag(client, predictions, db):
+    user_id, order = predictions
+    url = f"/api/user/{user_id}/difficulty-predictions"
+
+    response = client.get(url, params={"limit": 10})
+    etag = response.headers["etag"]
+    assert client.get(url, params={"limit": 10}, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(url, params={"limit": 5}, headers={"If-None-Match": etag}).status_code == 200
+
+    routes._upsert_predictions(db, user_id, {order[-1]: 0.99})
+    db.commit()
+    changed = client.get(url, params={"limit": 10}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["problems"][0]["id"] == order[-1]
+
+
+def test_predictions_etag_covers_problem_titles(client, predictions, db):
+    user_id, order = predictions
+    url = f"/api/user/{user_id}/difficulty-predictions"
+    etag = client.get(url, params={"limit": 10}).headers["etag"]
+
+    db.query(Problem).filter(Problem.id == order[0]).one().title = "Renamed"
+    db.commit()
+    changed = client.get(url, params={"limit": 10}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["problems"][0]["title"] == "Renamed"
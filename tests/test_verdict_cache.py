@@ -0,0 +1,49 @@
+"""Verdict cache keys: formatting-only edits share a verdict, except where the verdict quotes line numbers."""
+import pytest
+
+from app import routes
+from app.services.verdict_cache import VerdictCache
+
+TESTS = [("", "1")]
+
+
+@pytest.fixture
+def judged(monkeypatch):
+    """Codes actually judged; the fake judge fails with a runtime error on the line of `1/0`."""
+    calls = []
+
+    def judge(code, tests, on_test=None):
+        calls.append(code)
+        if "1/0" not in code:
+            return ("wrong_answer", "Line 1: got '' but expected '1'", [])
+        line = code.split("\n").index("x = 1/0") + 1
+        return ("runtime", f'Runtime error: File "<string>", line {line}, in <module>', [])
+
+    monkeypatch.setattr(routes, "verdict_cache", VerdictCache(max_size=16))
+    monkeypatch.setattr(routes.CodeExecutor, "judge", staticmethod(judge))
+    return calls
+
+
+def test_formatting_edits_share_a_verdict(judged):
+    routes._judge_with_cache("print( 2 )", TESTS)
+    assert routes._judge_with_cache("# try this\nprint(2)  # two", TESTS)[0] == "wrong_answer"
+    assert len(judged) == 1
+
+
+def test_runtime_verdicts_keep_their_line_numbers(judged):
+    first = routes._judge_with_cache("x = 1/0", TESTS)
+    moved = routes._judge_with_cache("# comment\n\n\n\nx = 1/0", TESTS)
+    assert "line 1," in first[1] and "line 5," in moved[1]
+    assert routes._judge_with_cache("x = 1/0", TESTS) == first
+    assert len(judged) == 2
+
+
+def test_runtime_verdict_under_a_normalized_key_is_ignored():
+    cache = VerdictCache(max_size=16)
+    verdict = ("runtime", "Runtime error: line 1", [])
+    key = cache.make_key(TESTS, "x = 1/0")
+    cache.put(key, verdict)
+    assert cache.get(key) is None
+    exact_key = cache.make_key(TESTS, "x = 1/0", exact=True)
+    cache.put(exact_key, verdict)
+    assert cache.get(exact_key) == verdict